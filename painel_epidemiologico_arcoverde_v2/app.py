@@ -17,6 +17,8 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import folium
 from streamlit_folium import st_folium
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from concurrent.futures import ThreadPoolExecutor
 import os
 
 # Configuração da página
@@ -30,126 +32,41 @@ st.set_page_config(
 # Importações locais
 from config import (
     MUNICIPIO, SISTEMAS, DOENCAS_SINAN, TEMA_CORES, 
-    ATUALIZACAO, FAIXAS_ETARIAS
+    ATUALIZACAO, FAIXAS_ETARIAS, BASE_DIR
 )
 from data_loader import data_loader, calcular_faixa_etaria, processar_cid, set_demo_mode
 from visualizations import charts, maps
 
 # CSS personalizado para estilo similar ao CNIE
-st.markdown("""
-<style>
-    /* Cores principais */
-    :root {
-        --primary: #1351B4;
-        --secondary: #2670E8;
-        --success: #168821;
-        --warning: #FFCD07;
-        --danger: #E52207;
-        --info: #155BCB;
-    }
-    
-    /* Header */
-    .main-header {
-        background: linear-gradient(135deg, #1351B4 0%, #2670E8 100%);
-        color: white;
-        padding: 2rem;
-        border-radius: 10px;
-        margin-bottom: 2rem;
-        text-align: center;
-    }
-    
-    .main-header h1 {
-        margin: 0;
-        font-size: 2.5rem;
-        font-weight: 700;
-    }
-    
-    .main-header p {
-        margin: 0.5rem 0 0 0;
-        font-size: 1.1rem;
-        opacity: 0.9;
-    }
-    
-    /* Banner de modo demonstração */
-    .demo-banner {
-        background: linear-gradient(135deg, #FFCD07 0%, #FFA500 100%);
-        color: #333;
-        padding: 1rem;
-        border-radius: 8px;
-        margin-bottom: 1rem;
-        text-align: center;
-        font-weight: bold;
-        border: 2px solid #FF8C00;
-    }
-    
-    /* Banner de erro de conexão */
-    .error-banner {
-        background: linear-gradient(135deg, #E52207 0%, #C41E3A 100%);
-        color: white;
-        padding: 1rem;
-        border-radius: 8px;
-        margin-bottom: 1rem;
-        text-align: center;
-        font-weight: bold;
-    }
-    
-    /* Info box */
-    .info-box {
-        background: #e8f4fd;
-        border-left: 4px solid var(--info);
-        padding: 1rem;
-        border-radius: 0 8px 8px 0;
-        margin: 1rem 0;
-    }
-    
-    /* Warning box */
-    .warning-box {
-        background: #fff8e1;
-        border-left: 4px solid var(--warning);
-        padding: 1rem;
-        border-radius: 0 8px 8px 0;
-        margin: 1rem 0;
-    }
-    
-    /* Footer */
-    .footer {
-        text-align: center;
-        padding: 2rem;
-        color: #666;
-        border-top: 1px solid #eee;
-        margin-top: 3rem;
-    }
-    
-    /* Métricas */
-    [data-testid="stMetricValue"] {
-        font-size: 2rem !important;
-        font-weight: 700 !important;
-        color: var(--primary) !important;
-    }
-    
-    [data-testid="stMetricLabel"] {
-        font-size: 0.9rem !important;
-        color: #666 !important;
-    }
-    
-    /* Abas */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 8px;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        background: #f0f2f6;
-        border-radius: 8px 8px 0 0;
-        padding: 10px 20px;
-        font-weight: 500;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background: var(--primary) !important;
-        color: white !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def carregar_css() -> str:
+    """Lê o CSS do dashboard uma única vez por processo"""
+    return (BASE_DIR / "static" / "dashboard.css").read_text(encoding='utf-8')
+
+
+st.markdown(f"<style>\n{carregar_css()}</style>", unsafe_allow_html=True)
+
+
+# Separador de milhar no padrão brasileiro (1.234)
+_MILHAR_BR = str.maketrans(',', '.')
+
+# Abas do painel (chave -> rótulo exibido)
+ABAS = {
+    'SIM': "📊 SIM (Mortalidade)",
+    'SINAN': "🦠 SINAN (Notificações)",
+    'SINASC': "👶 SINASC (Nascimentos)",
+    'Comparativo': "📈 Comparativo",
+    'Mapa': "🗺️ Mapa"
+}
+
+# Sistemas de informação necessários em cada aba
+SISTEMAS_POR_ABA = {
+    'SIM': ('SIM',),
+    'SINAN': ('SINAN',),
+    'SINASC': ('SINASC',),
+    'Comparativo': ('SIM', 'SINAN', 'SINASC'),
+    'Mapa': ()
+}
 
 
 # Variáveis de estado da sessão
@@ -162,12 +79,58 @@ if 'connection_errors' not in st.session_state:
 
 
 # Funções auxiliares
-@st.cache_data(ttl=3600)
+def _shrink(df: pd.DataFrame) -> pd.DataFrame:
+    """Reduz tipos das colunas (categorias e numéricos compactos)"""
+    for col in ('sexo', 'raca_cor', 'escolaridade', 'causa_basica', 'doenca', 'tipo_parto'):
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    
+    for col in ('ano', 'mes', 'idade', 'gestacao_semanas', 'peso', 'idade_mae'):
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+            tipo = 'integer' if pd.api.types.is_integer_dtype(df[col]) else 'float'
+            df[col] = pd.to_numeric(df[col], downcast=tipo)
+    
+    return df
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def carregar_dados_sistema(sistema: str, anos: list, **kwargs):
-    """Carrega dados com cache"""
-    return data_loader.get_multi_years_data(sistema, anos, **kwargs)
+    """
+    Carrega dados com cache em dois níveis
+    
+    - Memória: st.cache_data (por processo)
+    - Disco: Parquet via DataCache (compartilhado entre processos)
+    """
+    chave = f"painel_{sistema.lower()}_{min(anos)}_{max(anos)}"
+    if kwargs.get('doenca'):
+        chave += f"_{kwargs['doenca']}"
+    
+    df = data_loader.cache.get(chave, max_age_hours=1)
+    if df is None:
+        df = _shrink(data_loader.get_multi_years_data(sistema, anos, **kwargs))
+        if not df.empty:
+            data_loader.cache.set(chave, df, source='painel')
+    return df
+
+
+def contem_dados_simulados(df: pd.DataFrame) -> bool:
+    """
+    Indica se o DataFrame contém dados simulados (modo demonstração)
+    
+    A coluna '_demo_data' só é criada pelo gerador de dados simulados, então
+    sua presença basta (inclusive quando anos reais e simulados foram
+    concatenados) e evita varrer a coluna inteira.
+    """
+    return '_demo_data' in df.columns
+
+
+@st.cache_data(ttl=3600, max_entries=64, show_spinner=False)
+def _grafico(nome: str, *args, **kwargs):
+    """Gera um gráfico de `charts` com cache entre reruns"""
+    return getattr(charts, nome)(*args, **kwargs)
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def calcular_indicadores(df_sim: pd.DataFrame, df_sinan: pd.DataFrame, 
                          df_sinasc: pd.DataFrame) -> dict:
     """Calcula indicadores principais"""
@@ -192,11 +155,11 @@ def calcular_indicadores(df_sim: pd.DataFrame, df_sinan: pd.DataFrame,
     
     # Óbitos infantis (< 1 ano)
     if not df_sim.empty and 'idade' in df_sim.columns:
-        indicadores['obitos_infantis'] = len(df_sim[df_sim['idade'] < 1])
+        indicadores['obitos_infantis'] = np.count_nonzero(df_sim['idade'].to_numpy() < 1)
     
     # Baixo peso ao nascer (< 2500g)
     if not df_sinasc.empty and 'peso' in df_sinasc.columns:
-        indicadores['baixo_peso'] = len(df_sinasc[df_sinasc['peso'] < 2500])
+        indicadores['baixo_peso'] = np.count_nonzero(df_sinasc['peso'].to_numpy() < 2500)
     
     return indicadores
 
@@ -332,36 +295,49 @@ def render_sidebar():
     return anos_selecionados, sistemas_selecionados, doencas_selecionadas
 
 
-def render_indicadores(indicadores: dict):
-    """Renderiza cards de indicadores"""
+def render_indicadores(indicadores: dict, carregados: dict = None):
+    """
+    Renderiza cards de indicadores
+    
+    Sistemas ausentes em `carregados` (não usados pela aba ativa) são
+    exibidos como "—" em vez de zero.
+    """
+    if carregados is None:
+        carregados = {'SIM': True, 'SINAN': True, 'SINASC': True}
+    aviso = "Abra a aba do sistema ou o Comparativo para carregar os dados."
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         st.metric(
             label="Óbitos (SIM)",
-            value=f"{indicadores['obitos']:,}".replace(",", "."),
-            delta=None
+            value=format(indicadores['obitos'], ',d').translate(_MILHAR_BR) if carregados['SIM'] else "—",
+            delta=None,
+            help=None if carregados['SIM'] else aviso
         )
     
     with col2:
         st.metric(
             label="Notificações (SINAN)",
-            value=f"{indicadores['notificacoes']:,}".replace(",", "."),
-            delta=None
+            value=format(indicadores['notificacoes'], ',d').translate(_MILHAR_BR) if carregados['SINAN'] else "—",
+            delta=None,
+            help=None if carregados['SINAN'] else aviso
         )
     
     with col3:
         st.metric(
             label="Nascimentos (SINASC)",
-            value=f"{indicadores['nascimentos']:,}".replace(",", "."),
-            delta=None
+            value=format(indicadores['nascimentos'], ',d').translate(_MILHAR_BR) if carregados['SINASC'] else "—",
+            delta=None,
+            help=None if carregados['SINASC'] else aviso
         )
     
     with col4:
         st.metric(
             label="Taxa Mortalidade",
-            value=f"{indicadores['taxa_mortalidade']:.1f}‰",
-            delta=None
+            value=f"{indicadores['taxa_mortalidade']:.1f}‰" if carregados['SIM'] else "—",
+            delta=None,
+            help=None if carregados['SIM'] else aviso
         )
 
 
@@ -374,7 +350,7 @@ def render_tab_sim(df_sim: pd.DataFrame):
         return
     
     # Aviso de dados simulados
-    if '_demo_data' in df_sim.columns and df_sim['_demo_data'].any():
+    if contem_dados_simulados(df_sim):
         st.warning("⚠️ Estes dados são FICTÍCIOS (modo demonstração).")
     
     # Layout em colunas
@@ -383,8 +359,14 @@ def render_tab_sim(df_sim: pd.DataFrame):
     with col1:
         # Evolução temporal
         if 'ano' in df_sim.columns:
-            evolucao = df_sim.groupby('ano').size().reset_index(name='quantidade')
-            fig = charts.evolucao_temporal(
+            evolucao = (
+                df_sim['ano'].value_counts(sort=False)
+                .sort_index()
+                .rename_axis('ano')
+                .reset_index(name='quantidade')
+            )
+            fig = _grafico(
+                'evolucao_temporal',
                 evolucao, 
                 titulo="Evolução de Óbitos por Ano",
                 cor=TEMA_CORES["perigo"]
@@ -394,7 +376,7 @@ def render_tab_sim(df_sim: pd.DataFrame):
     with col2:
         # Distribuição por sexo
         if 'sexo' in df_sim.columns:
-            fig = charts.distribuicao_sexo(df_sim, titulo="Distribuição por Sexo")
+            fig = _grafico('distribuicao_sexo', df_sim, titulo="Distribuição por Sexo")
             st.plotly_chart(fig, use_container_width=True)
     
     # Segunda linha
@@ -403,25 +385,26 @@ def render_tab_sim(df_sim: pd.DataFrame):
     with col3:
         # Distribuição por faixa etária
         if 'idade' in df_sim.columns:
-            fig = charts.distribuicao_faixa_etaria(df_sim, titulo="Distribuição por Faixa Etária")
+            fig = _grafico('distribuicao_faixa_etaria', df_sim, titulo="Distribuição por Faixa Etária")
             st.plotly_chart(fig, use_container_width=True)
     
     with col4:
         # Distribuição por raça/cor
         if 'raca_cor' in df_sim.columns:
-            fig = charts.distribuicao_raca_cor(df_sim, titulo="Distribuição por Raça/Cor")
+            fig = _grafico('distribuicao_raca_cor', df_sim, titulo="Distribuição por Raça/Cor")
             st.plotly_chart(fig, use_container_width=True)
     
     # Terceira linha - Causas principais
     if 'causa_basica' in df_sim.columns:
         st.subheader("Principais Causas de Óbito (CID)")
-        fig = charts.top_causas(df_sim, n_top=10)
+        fig = _grafico('top_causas', df_sim, n_top=10)
         st.plotly_chart(fig, use_container_width=True)
     
     # Heatmap mensal
     if 'ano' in df_sim.columns and 'mes' in df_sim.columns:
         st.subheader("Heatmap de Óbitos por Ano e Mês")
-        fig = charts.heatmap_mensal(df_sim, titulo="")
+        heat = df_sim.groupby(['ano', 'mes'], observed=True).size().unstack('mes', fill_value=0)
+        fig = _grafico('heatmap_mensal', heat, titulo="", agregado=True)
         st.plotly_chart(fig, use_container_width=True)
     
     # Tabela de dados
@@ -438,17 +421,28 @@ def render_tab_sinan(df_sinan: pd.DataFrame):
         return
     
     # Aviso de dados simulados
-    if '_demo_data' in df_sinan.columns and df_sinan['_demo_data'].any():
+    if contem_dados_simulados(df_sinan):
         st.warning("⚠️ Estes dados são FICTÍCIOS (modo demonstração).")
     
+    # Doenças mais notificadas (usadas no gráfico de barras e na evolução)
+    if 'doenca' in df_sinan.columns:
+        doencas = df_sinan['doenca'].value_counts()
+        doencas = doencas[doencas > 0].head(8)
+    
     # Layout em colunas
     col1, col2 = st.columns(2)
     
     with col1:
         # Evolução temporal
         if 'ano' in df_sinan.columns:
-            evolucao = df_sinan.groupby('ano').size().reset_index(name='quantidade')
-            fig = charts.evolucao_temporal(
+            evolucao = (
+                df_sinan['ano'].value_counts(sort=False)
+                .sort_index()
+                .rename_axis('ano')
+                .reset_index(name='quantidade')
+            )
+            fig = _grafico(
+                'evolucao_temporal',
                 evolucao,
                 titulo="Evolução de Notificações por Ano",
                 cor=TEMA_CORES["alerta"]
@@ -458,19 +452,18 @@ def render_tab_sinan(df_sinan: pd.DataFrame):
     with col2:
         # Distribuição por doença
         if 'doenca' in df_sinan.columns:
-            doencas = df_sinan['doenca'].value_counts().head(8)
-            fig = go.Figure(data=[
+            fig = go.Figure(
                 go.Bar(
-                    x=doencas.values,
-                    y=doencas.index,
+                    x=doencas.to_numpy(),
+                    y=doencas.index.astype(str),
                     orientation='h',
                     marker_color=TEMA_CORES["alerta"]
+                ),
+                layout=dict(
+                    title="Notificações por Doença",
+                    xaxis_title="Quantidade",
+                    yaxis_title="Doença"
                 )
-            ])
-            fig.update_layout(
-                title="Notificações por Doença",
-                xaxis_title="Quantidade",
-                yaxis_title="Doença"
             )
             st.plotly_chart(charts._apply_theme(fig), use_container_width=True)
     
@@ -480,28 +473,39 @@ def render_tab_sinan(df_sinan: pd.DataFrame):
     with col3:
         # Distribuição por faixa etária
         if 'idade' in df_sinan.columns:
-            fig = charts.distribuicao_faixa_etaria(df_sinan, titulo="Distribuição por Faixa Etária")
+            fig = _grafico('distribuicao_faixa_etaria', df_sinan, titulo="Distribuição por Faixa Etária")
             st.plotly_chart(fig, use_container_width=True)
     
     with col4:
         # Distribuição por sexo
         if 'sexo' in df_sinan.columns:
-            fig = charts.distribuicao_sexo(df_sinan, titulo="Distribuição por Sexo")
+            fig = _grafico('distribuicao_sexo', df_sinan, titulo="Distribuição por Sexo")
             st.plotly_chart(fig, use_container_width=True)
     
     # Evolução por doença
     if 'ano' in df_sinan.columns and 'doenca' in df_sinan.columns:
         st.subheader("Evolução por Doença")
-        evo_doencas = df_sinan.groupby(['ano', 'doenca']).size().reset_index(name='quantidade')
+        principais = doencas.index[:5]
+        evo_doencas = (
+            df_sinan[df_sinan['doenca'].isin(principais)]
+            .groupby(['ano', 'doenca'], observed=True)
+            .size()
+            .reset_index(name='quantidade')
+        )
+        
+        # Uma única passada separa as séries; a ordem segue o ranking
+        por_doenca = dict(tuple(evo_doencas.groupby('doenca', sort=False, observed=True)))
         
         fig = go.Figure()
-        for doenca in evo_doencas['doenca'].unique()[:5]:
-            dados = evo_doencas[evo_doencas['doenca'] == doenca]
-            fig.add_trace(go.Scatter(
-                x=dados['ano'],
-                y=dados['quantidade'],
+        for doenca in principais:
+            if doenca not in por_doenca:
+                continue
+            dados = por_doenca[doenca]
+            fig.add_trace(go.Scattergl(
+                x=dados['ano'].to_numpy(),
+                y=dados['quantidade'].to_numpy(),
                 mode='lines+markers',
-                name=doenca
+                name=str(doenca)
             ))
         
         fig.update_layout(
@@ -526,7 +530,7 @@ def render_tab_sinasc(df_sinasc: pd.DataFrame):
         return
     
     # Aviso de dados simulados
-    if '_demo_data' in df_sinasc.columns and df_sinasc['_demo_data'].any():
+    if contem_dados_simulados(df_sinasc):
         st.warning("⚠️ Estes dados são FICTÍCIOS (modo demonstração).")
     
     # Indicadores específicos
@@ -534,17 +538,17 @@ def render_tab_sinasc(df_sinasc: pd.DataFrame):
     
     with col1:
         total_nasc = len(df_sinasc)
-        st.metric("Total de Nascimentos", f"{total_nasc:,}".replace(",", "."))
+        st.metric("Total de Nascimentos", format(total_nasc, ',d').translate(_MILHAR_BR))
     
     with col2:
         if 'peso' in df_sinasc.columns:
-            baixo_peso = len(df_sinasc[df_sinasc['peso'] < 2500])
+            baixo_peso = np.count_nonzero(df_sinasc['peso'].to_numpy() < 2500)
             pct_baixo_peso = (baixo_peso / total_nasc * 100) if total_nasc > 0 else 0
             st.metric("Baixo Peso (<2500g)", f"{pct_baixo_peso:.1f}%")
     
     with col3:
         if 'gestacao_semanas' in df_sinasc.columns:
-            prematuro = len(df_sinasc[df_sinasc['gestacao_semanas'] < 37])
+            prematuro = np.count_nonzero(df_sinasc['gestacao_semanas'].to_numpy() < 37)
             pct_prematuro = (prematuro / total_nasc * 100) if total_nasc > 0 else 0
             st.metric("Prematuros (<37s)", f"{pct_prematuro:.1f}%")
     
@@ -561,8 +565,14 @@ def render_tab_sinasc(df_sinasc: pd.DataFrame):
     with col1:
         # Evolução temporal
         if 'ano' in df_sinasc.columns:
-            evolucao = df_sinasc.groupby('ano').size().reset_index(name='quantidade')
-            fig = charts.evolucao_temporal(
+            evolucao = (
+                df_sinasc['ano'].value_counts(sort=False)
+                .sort_index()
+                .rename_axis('ano')
+                .reset_index(name='quantidade')
+            )
+            fig = _grafico(
+                'evolucao_temporal',
                 evolucao,
                 titulo="Evolução de Nascimentos por Ano",
                 cor=TEMA_CORES["sucesso"]
@@ -572,11 +582,11 @@ def render_tab_sinasc(df_sinasc: pd.DataFrame):
     with col2:
         # Distribuição por sexo
         if 'sexo' in df_sinasc.columns:
-            fig = charts.distribuicao_sexo(df_sinasc, titulo="Distribuição por Sexo do RN")
+            fig = _grafico('distribuicao_sexo', df_sinasc, titulo="Distribuição por Sexo do RN")
             st.plotly_chart(fig, use_container_width=True)
     
     # Gráficos específicos do SINASC
-    graficos_sinasc = charts.indicadores_sinasc(df_sinasc)
+    graficos_sinasc = _grafico('indicadores_sinasc', df_sinasc)
     
     col3, col4 = st.columns(2)
     
@@ -614,37 +624,36 @@ def render_tab_comparativo(df_sim: pd.DataFrame, df_sinan: pd.DataFrame, df_sina
         return
     
     # Aviso de dados simulados
-    has_demo_data = any(
-        '_demo_data' in df.columns and df['_demo_data'].any()
-        for df in dados.values()
-    )
+    has_demo_data = any(contem_dados_simulados(df) for df in dados.values())
     if has_demo_data:
         st.warning("⚠️ Alguns dados exibidos são FICTÍCIOS (modo demonstração).")
     
+    # Contagem ano -> registros calculada uma vez (gráfico e tabela)
+    contagens = {
+        sistema: df['ano'].value_counts(sort=False).sort_index()
+        for sistema, df in dados.items() if 'ano' in df.columns
+    }
+    
     # Gráfico comparativo
-    fig = charts.comparativo_sistemas(dados)
+    fig = _grafico('comparativo_sistemas', contagens)
     st.plotly_chart(fig, use_container_width=True)
     
     # Tabela resumo
     st.subheader("Resumo por Sistema e Ano")
     
-    resumo = []
-    for sistema, df in dados.items():
-        if 'ano' in df.columns:
-            for ano in sorted(df['ano'].unique()):
-                count = len(df[df['ano'] == ano])
-                resumo.append({
-                    'Sistema': sistema,
-                    'Ano': ano,
-                    'Quantidade': count
-                })
-    
-    if resumo:
-        df_resumo = pd.DataFrame(resumo)
-        pivot_resumo = df_resumo.pivot(index='Ano', columns='Sistema', values='Quantidade').fillna(0)
+    if contagens:
+        pivot_resumo = pd.DataFrame(contagens).fillna(0).astype(int).sort_index()
+        pivot_resumo.index.name = 'Ano'
+        pivot_resumo.columns.name = 'Sistema'
         st.dataframe(pivot_resumo, use_container_width=True)
 
 
+@st.cache_resource
+def carregar_mapa_base() -> folium.Map:
+    """Mapa base do município (estático, criado uma única vez por processo)"""
+    return maps.create_base_map()
+
+
 def render_tab_mapa():
     """Renderiza aba do mapa"""
     st.header("🗺️ Localização Geográfica")
@@ -653,7 +662,7 @@ def render_tab_mapa():
     
     with col1:
         # Mapa do município
-        m = maps.create_base_map()
+        m = carregar_mapa_base()
         st_folium(m, width=700, height=500)
     
     with col2:
@@ -718,30 +727,33 @@ def main():
     # Limpar erros anteriores
     st.session_state.connection_errors = []
     
+    # Carregar apenas os sistemas usados pela aba ativa
+    aba_ativa = st.session_state.get('active_tab', next(iter(ABAS)))
+    carregados = {
+        sistema: ativo and sistema in SISTEMAS_POR_ABA[aba_ativa]
+        for sistema, ativo in sistemas_selecionados.items()
+    }
+    
     # Barra de progresso durante o carregamento
     with st.spinner("Carregando dados..."):
-        # Carregar dados
-        df_sim = pd.DataFrame()
-        df_sinan = pd.DataFrame()
-        df_sinasc = pd.DataFrame()
-        
-        if sistemas_selecionados['SIM']:
-            try:
-                df_sim = carregar_dados_sistema('SIM', anos_selecionados)
-            except Exception as e:
-                st.session_state.connection_errors.append(f"SIM: {str(e)}")
+        # Carregar dados (sistemas em paralelo: cada carga é dominada por I/O)
+        dados = {s: pd.DataFrame() for s in sistemas_selecionados}
         
-        if sistemas_selecionados['SINAN']:
-            try:
-                df_sinan = carregar_dados_sistema('SINAN', anos_selecionados)
-            except Exception as e:
-                st.session_state.connection_errors.append(f"SINAN: {str(e)}")
+        # As threads recebem o contexto da sessão para usar o st.cache_data
+        with ThreadPoolExecutor(max_workers=len(sistemas_selecionados),
+                                initializer=add_script_run_ctx,
+                                initargs=(None, get_script_run_ctx())) as executor:
+            tarefas = {
+                sistema: executor.submit(carregar_dados_sistema, sistema, anos_selecionados)
+                for sistema, ativo in carregados.items() if ativo
+            }
+            for sistema, tarefa in tarefas.items():
+                try:
+                    dados[sistema] = tarefa.result()
+                except Exception as e:
+                    st.session_state.connection_errors.append(f"{sistema}: {str(e)}")
         
-        if sistemas_selecionados['SINASC']:
-            try:
-                df_sinasc = carregar_dados_sistema('SINASC', anos_selecionados)
-            except Exception as e:
-                st.session_state.connection_errors.append(f"SINASC: {str(e)}")
+        df_sim, df_sinan, df_sinasc = dados['SIM'], dados['SINAN'], dados['SINASC']
         
         # Atualizar timestamp
         st.session_state.last_update_time = datetime.now()
@@ -750,41 +762,42 @@ def main():
     indicadores = calcular_indicadores(df_sim, df_sinan, df_sinasc)
     
     # Renderizar indicadores
-    render_indicadores(indicadores)
+    render_indicadores(indicadores, carregados)
     
     st.markdown("---")
     
-    # Abas
-    tab_sim, tab_sinan, tab_sinasc, tab_comp, tab_mapa = st.tabs([
-        "📊 SIM (Mortalidade)",
-        "🦠 SINAN (Notificações)",
-        "👶 SINASC (Nascimentos)",
-        "📈 Comparativo",
-        "🗺️ Mapa"
-    ])
+    # Abas (apenas a aba ativa é renderizada)
+    aba_ativa = st.radio(
+        "Visão",
+        options=list(ABAS),
+        format_func=ABAS.get,
+        horizontal=True,
+        key='active_tab',
+        label_visibility="collapsed"
+    )
     
-    with tab_sim:
+    if aba_ativa == 'SIM':
         if sistemas_selecionados['SIM']:
             render_tab_sim(df_sim)
         else:
             st.info("Ative o SIM na barra lateral para visualizar dados.")
     
-    with tab_sinan:
+    elif aba_ativa == 'SINAN':
         if sistemas_selecionados['SINAN']:
             render_tab_sinan(df_sinan)
         else:
             st.info("Ative o SINAN na barra lateral para visualizar dados.")
     
-    with tab_sinasc:
+    elif aba_ativa == 'SINASC':
         if sistemas_selecionados['SINASC']:
             render_tab_sinasc(df_sinasc)
         else:
             st.info("Ative o SINASC na barra lateral para visualizar dados.")
     
-    with tab_comp:
+    elif aba_ativa == 'Comparativo':
         render_tab_comparativo(df_sim, df_sinan, df_sinasc)
     
-    with tab_mapa:
+    elif aba_ativa == 'Mapa':
         render_tab_mapa()
     
     # Footer
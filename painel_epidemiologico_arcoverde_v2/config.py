@@ -61,7 +61,7 @@ SISTEMAS = {
         "sigla": "SIM",
         "descricao": "Dados sobre óbitos no território nacional",
         "url": "https://svs.aids.gov.br/dantps/centraisdeconteudos/mortalidade/",
-        "anos_disponiveis": list(range(1996, 2025)),
+        "anos_disponiveis": range(1996, 2025),
         "principal_indicador": "Óbitos"
     },
     "SINAN": {
@@ -69,7 +69,7 @@ SISTEMAS = {
         "sigla": "SINAN",
         "descricao": "Dados de doenças e agravos de notificação compulsória",
         "url": "https://portalsinan.saude.gov.br/",
-        "anos_disponiveis": list(range(2001, 2025)),
+        "anos_disponiveis": range(2001, 2025),
         "principal_indicador": "Notificações"
     },
     "SINASC": {
@@ -77,7 +77,7 @@ SISTEMAS = {
         "sigla": "SINASC",
         "descricao": "Dados sobre nascimentos no território nacional",
         "url": "https://svs.aids.gov.br/dantps/centraisdeconteudos/nascimentos/",
-        "anos_disponiveis": list(range(1994, 2025)),
+        "anos_disponiveis": range(1994, 2025),
         "principal_indicador": "Nascimentos"
     }
 }
@@ -145,7 +145,8 @@ ATUALIZACAO = {
     "frequencia": "semanal",
     "dia_semana": "domingo",
     "hora": "03:00",
-    "retencao_dias": 90  # Manter cache por 90 dias
+    "retencao_dias": 90,  # Manter cache por 90 dias
+    "historico_max": 52  # Atualizações mantidas em memória pelo agendador
 }
 
 # APIs
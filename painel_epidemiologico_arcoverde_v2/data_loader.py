@@ -11,30 +11,99 @@ SEGURANÇA DO CACHE:
 import pandas as pd
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
 import logging
+import logging.handlers
+import queue
+import atexit
+import importlib.util
 from typing import Dict, List, Optional, Tuple
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import stat
+import gzip
+import fcntl
+import ftplib
+import threading
+from functools import lru_cache
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.dataset as pads
+import pyarrow.compute as pc
 
 # Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/data_loader.log'),
-        logging.StreamHandler()
-    ]
+# Os registros vão para uma fila; a escrita em arquivo/console acontece na
+# thread do QueueListener, fora do caminho de leitura/gravação do cache
+_fila_log = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(
+    _fila_log,
+    logging.FileHandler('logs/data_loader.log'),
+    logging.StreamHandler(),
+    respect_handler_level=True
 )
+for _handler in _log_listener.handlers:
+    _handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_queue_handler = logging.handlers.QueueHandler(_fila_log)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))  # formatação final no listener
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 from config import (
     MUNICIPIO, SISTEMAS, DOENCAS_SINAN, APIS, 
     CACHE_DIR, DATA_DIR, FAIXAS_ETARIAS, CIDS_PRINCIPAIS
 )
+from faixas import calcular_faixa_etaria  # reexportada (usada pelo app)
+
+# Permissões do cache: arquivos 0o600 e diretório 0o700 (apenas proprietário)
+_MODE_FILE = stat.S_IRUSR | stat.S_IWUSR
+_MODE_DIR = stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR
+
+# Falhas de rede/timeout no download do DATASUS (FTP) ou das APIs: são as
+# únicas tratadas como transitórias (ConnectionError) fora do modo demonstração
+ERROS_REDE = (
+    ConnectionError, TimeoutError, EOFError, ftplib.error_temp,
+    requests.exceptions.ConnectionError, requests.exceptions.Timeout
+)
+
+# Validade do GeoJSON em cache (a malha municipal muda no máximo anualmente)
+GEOJSON_MAX_AGE_DAYS = 30
+
+
+def _criar_sessao_http() -> requests.Session:
+    """
+    Cria sessão HTTP com pool de conexões e novas tentativas
+    
+    A sessão é compartilhada pelo módulo para reaproveitar conexões
+    (keep-alive/TLS) entre chamadas e instâncias.
+    """
+    sessao = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504]
+        )
+    )
+    sessao.mount("https://", adapter)
+    sessao.mount("http://", adapter)
+    return sessao
+
+
+_IBGE_SESSION = _criar_sessao_http()
+
+
+def get_session() -> requests.Session:
+    """Sessão HTTP compartilhada do processo (painel, agendador e IBGEClient)"""
+    return _IBGE_SESSION
 
 
 class IBGEClient:
@@ -42,7 +111,7 @@ class IBGEClient:
     
     def __init__(self):
         self.base_url = APIS["ibge_localidades"]
-        self.session = requests.Session()
+        self.session = get_session()
         
     def get_municipio_info(self, codigo_ibge: int) -> Dict:
         """Obtém informações detalhadas do município"""
@@ -89,15 +158,60 @@ class IBGEClient:
             return []
     
     def get_geojson_municipio(self, codigo_ibge: int) -> Optional[Dict]:
-        """Obtém o GeoJSON do município para mapas"""
+        """
+        Obtém o GeoJSON do município para mapas
+        
+        A malha muda raramente, então a resposta fica em cache no disco
+        (gzip) por GEOJSON_MAX_AGE_DAYS dias.
+        """
+        cache_path = CACHE_DIR / f"geojson_{codigo_ibge}.json.gz"
+        try:
+            idade = time.time() - cache_path.stat().st_mtime
+            if idade < GEOJSON_MAX_AGE_DAYS * 86400:
+                return json.loads(gzip.decompress(cache_path.read_bytes()))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Cache de GeoJSON inválido, baixando novamente: {e}")
+        
         try:
             url = f"{APIS['ibge_malhas']}/municipios/{codigo_ibge}?formato=application/json"
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
-            return response.json()
+            geojson = response.json()
         except Exception as e:
             logger.error(f"Erro ao obter GeoJSON: {e}")
             return None
+        
+        try:
+            cache_path.write_bytes(gzip.compress(json.dumps(geojson).encode('utf-8')))
+            os.chmod(cache_path, _MODE_FILE)
+        except Exception as e:
+            logger.warning(f"Não foi possível salvar GeoJSON em cache: {e}")
+        return geojson
+
+
+# Colunas de códigos convertidas para categoria ao gravar o cache
+_COLUNAS_CATEGORICAS = (
+    'sexo', 'raca_cor', 'escolaridade', 'estado_civil',
+    'doenca', 'evolucao', 'tipo_parto'
+)
+
+# Linhas por row group nos Parquet do cache
+_LINHAS_POR_GRUPO = 65536
+
+# Colunas usadas em filtros de leitura (recebem estatísticas no Parquet)
+_COLUNAS_FILTRO = (
+    'ano', 'mes', 'codigo_municipio', 'CODMUNOCOR', 'ID_MUNICIP', 'CODMUNNASC'
+)
+
+
+@lru_cache(maxsize=1024)
+def _cache_paths(cache_dir: str, key: str) -> Tuple[Path, Path]:
+    """Caminhos de dados e metadados de uma chave (memoizado)"""
+    safe_key = key.replace('/', '_').replace('\\', '_')
+    base = Path(cache_dir)
+    return base / f"{safe_key}.parquet", base / f"{safe_key}_meta.json"
 
 
 class DataCache:
@@ -115,23 +229,85 @@ class DataCache:
         self.cache_dir = cache_dir
         self.cache_dir.mkdir(exist_ok=True)
         # Configurar permissões restritas no diretório de cache
-        os.chmod(self.cache_dir, stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR)
+        os.chmod(self.cache_dir, _MODE_DIR)
+        # Índice consolidado {chave: metadados}, evita ler um JSON por cache
+        self._index_path = self.cache_dir / "_index.json"
+        self._index_lock = threading.Lock()
         logger.info(f"Cache inicializado em: {self.cache_dir} (permissões: 0o700)")
         
     def _get_cache_path(self, key: str) -> Tuple[Path, Path]:
         """Retorna caminhos para dados e metadados"""
-        safe_key = key.replace('/', '_').replace('\\', '_')
-        data_path = self.cache_dir / f"{safe_key}.parquet"
-        meta_path = self.cache_dir / f"{safe_key}_meta.json"
-        return data_path, meta_path
+        return _cache_paths(str(self.cache_dir), key)
     
     def _set_file_permissions(self, filepath: Path):
         """Define permissões restritas no arquivo (apenas proprietário)"""
         try:
-            os.chmod(filepath, stat.S_IRUSR | stat.S_IWUSR)
+            os.chmod(filepath, _MODE_FILE)
         except Exception as e:
             logger.warning(f"Não foi possível definir permissões em {filepath}: {e}")
     
+    def _read_index(self) -> Dict[str, Dict]:
+        """Lê o índice de metadados (reconstrói a partir dos *_meta.json se ausente)"""
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Índice do cache inválido, reconstruindo: {e}")
+        
+        index = {}
+        for meta_file in self.cache_dir.glob("*_meta.json"):
+            try:
+                with open(meta_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                index[metadata.get('key', meta_file.name[:-len("_meta.json")])] = metadata
+            except Exception as e:
+                logger.warning(f"Erro ao ler {meta_file}: {e}")
+        return index
+    
+    def _update_index(self, key: Optional[str] = None, metadata: Optional[Dict] = None):
+        """
+        Atualiza (ou remove, com metadata=None) uma entrada do índice
+        
+        Sem chave, apenas grava o índice atual (reconstruído se ausente).
+        
+        A escrita é atômica (arquivo temporário + os.replace) e serializada
+        entre threads (lock) e entre processos (flock), pois painel e
+        agendador gravam no mesmo cache.
+        """
+        lock_path = self.cache_dir / "_index.lock"
+        tmp_path = self.cache_dir / f"_index.{os.getpid()}.tmp"
+        try:
+            with self._index_lock, open(lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                os.fchmod(lock_file.fileno(), _MODE_FILE)
+                index = self._read_index()
+                if key is not None and metadata is None:
+                    index.pop(key, None)
+                elif key is not None:
+                    index[key] = metadata
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    os.fchmod(f.fileno(), _MODE_FILE)
+                    json.dump(index, f, ensure_ascii=False)
+                os.replace(tmp_path, self._index_path)
+        except Exception as e:
+            logger.warning(f"Não foi possível atualizar índice do cache para {key}: {e}")
+    
+    @staticmethod
+    def _optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+        """Reduz colunas numéricas ao menor tipo que comporta os valores"""
+        reduzidas = {}
+        for col in df.columns:
+            serie = df[col]
+            if pd.api.types.is_bool_dtype(serie) or not pd.api.types.is_numeric_dtype(serie):
+                continue
+            tipo = 'integer' if pd.api.types.is_integer_dtype(serie) else 'float'
+            nova = pd.to_numeric(serie, downcast=tipo)
+            if nova.dtype != serie.dtype:
+                reduzidas[col] = nova
+        return df.assign(**reduzidas) if reduzidas else df
+    
     def get(self, key: str, max_age_hours: int = 168) -> Optional[pd.DataFrame]:  # 168h = 1 semana
         """Obtém dados do cache se válidos"""
         data_path, meta_path = self._get_cache_path(key)
@@ -153,8 +329,8 @@ class DataCache:
                     logger.info(f"Cache expirado para {key} (idade: {age})")
                     return None
             
-            # Carregar dados do Parquet
-            df = pd.read_parquet(data_path)
+            # Carregar dados do Parquet (memory map evita cópia do arquivo)
+            df = pd.read_parquet(data_path, memory_map=True)
             
             logger.info(f"Dados recuperados do cache: {key} ({len(df)} registros)")
             return df
@@ -168,9 +344,33 @@ class DataCache:
         data_path, meta_path = self._get_cache_path(key)
         
         try:
-            # Salvar dados em formato Parquet
-            df.to_parquet(data_path, index=False, compression='snappy')
-            self._set_file_permissions(data_path)
+            # Colunas de códigos com poucos valores distintos viram categorias
+            # (gravadas com codificação de dicionário no Parquet)
+            categoricas = {c: 'category' for c in _COLUNAS_CATEGORICAS if c in df.columns}
+            df_parquet = self._optimize_dtypes(df.astype(categoricas) if categoricas else df)
+            
+            # Salvar dados em formato Parquet (zstd comprime melhor que snappy).
+            # Row groups pequenos com estatísticas nas colunas de filtro
+            # permitem que leituras filtradas (get_lazy) pulem grupos inteiros.
+            # Cada row group é convertido e gravado por vez (só um pedaço em
+            # Arrow na memória) num arquivo temporário, trocado atomicamente
+            # no final: leitores nunca veem um Parquet pela metade.
+            schema = pa.Schema.from_pandas(df_parquet, preserve_index=False)
+            estatisticas = [c for c in _COLUNAS_FILTRO if c in df_parquet.columns]
+            tmp_path = data_path.with_name(f"{data_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                with pq.ParquetWriter(tmp_path, schema,
+                                      compression='zstd', compression_level=3,
+                                      use_dictionary=True,
+                                      data_page_size=1 << 20,
+                                      write_statistics=estatisticas or False) as writer:
+                    for inicio in range(0, len(df_parquet), _LINHAS_POR_GRUPO):
+                        parte = df_parquet.iloc[inicio:inicio + _LINHAS_POR_GRUPO]
+                        writer.write_table(pa.Table.from_pandas(parte, schema=schema, preserve_index=False))
+                self._set_file_permissions(tmp_path)
+                os.replace(tmp_path, data_path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
             
             # Salvar metadados em JSON
             metadata = {
@@ -184,14 +384,91 @@ class DataCache:
             }
             
             with open(meta_path, 'w', encoding='utf-8') as f:
+                # Permissões no descritor aberto, antes de gravar o conteúdo
+                os.fchmod(f.fileno(), _MODE_FILE)
                 json.dump(metadata, f, indent=2, ensure_ascii=False)
-            self._set_file_permissions(meta_path)
+            self._update_index(key, metadata)
             
             logger.info(f"Dados salvos no cache: {key} ({len(df)} registros, fonte: {source})")
             
         except Exception as e:
             logger.error(f"Erro ao salvar cache {key}: {e}")
     
+    def get_many(self, keys: List[str], columns: Optional[List[str]] = None,
+                 max_age_hours: int = 168) -> Optional[pd.DataFrame]:
+        """
+        Lê vários caches de uma vez (na ordem de `keys`)
+        
+        Os arquivos são lidos como um único dataset Arrow e convertidos para
+        pandas uma só vez, com a união das colunas de todos os arquivos
+        (ausentes viram nulos). Retorna None se alguma chave estiver ausente,
+        expirada ou com tipos incompatíveis; nesse caso o chamador deve
+        carregar as chaves uma a uma.
+        """
+        if not keys:
+            return None
+        
+        index = self._read_index()
+        limite = datetime.now() - timedelta(hours=max_age_hours)
+        paths = []
+        for key in keys:
+            metadata = index.get(key)
+            data_path, _ = self._get_cache_path(key)
+            if (metadata is None or not data_path.exists()
+                    or datetime.fromisoformat(metadata.get('timestamp', '1970-01-01')) < limite):
+                return None
+            paths.append(str(data_path))
+        
+        try:
+            # União dos esquemas: colunas que só existem em alguns anos (ex.:
+            # '_demo_data') não podem sumir por causa do primeiro arquivo
+            schema = pa.unify_schemas([pq.read_schema(p) for p in paths],
+                                      promote_options='permissive')
+            table = pads.dataset(paths, schema=schema, format='parquet').to_table(columns=columns)
+            df = table.to_pandas(self_destruct=True, split_blocks=True)
+            logger.info(f"Dados recuperados do cache: {len(keys)} chaves ({len(df)} registros)")
+            return df
+        except Exception as e:
+            # Esquemas incompatíveis entre anos, arquivo corrompido etc.
+            logger.warning(f"Leitura agrupada do cache falhou, lendo individualmente: {e}")
+            return None
+    
+    def count_rows(self, key: str, desde: Optional[float] = None) -> Optional[int]:
+        """
+        Quantidade de registros de um cache, lida do rodapé do Parquet
+        
+        Com `desde` (timestamp), só conta arquivos gravados a partir dele.
+        """
+        data_path, _ = self._get_cache_path(key)
+        try:
+            if desde is not None and data_path.stat().st_mtime < desde:
+                return None
+            return pq.ParquetFile(data_path).metadata.num_rows
+        except Exception:
+            return None
+    
+    def get_lazy(self, key: str, columns: Optional[List[str]] = None,
+                 filters=None, max_age_hours: int = 168) -> Optional[pads.Scanner]:
+        """
+        Retorna um leitor Arrow (sem carregar os dados) para um cache válido
+        
+        `columns` e `filters` (expressão pyarrow.compute, ex.:
+        pc.field('sexo') == 'F') são aplicados na leitura do Parquet, então
+        row groups excluídos pelas estatísticas nem são descomprimidos.
+        Use `.to_table().to_pandas()` para materializar.
+        """
+        data_path, _ = self._get_cache_path(key)
+        metadata = self._read_index().get(key)
+        if metadata is None or not data_path.exists():
+            return None
+        
+        cache_time = datetime.fromisoformat(metadata.get('timestamp', '1970-01-01'))
+        if datetime.now() - cache_time > timedelta(hours=max_age_hours):
+            logger.info(f"Cache expirado para {key}")
+            return None
+        
+        return pads.dataset(str(data_path), format='parquet').scanner(columns=columns, filter=filters)
+    
     def get_metadata(self, key: str) -> Optional[Dict]:
         """Obtém metadados de um cache"""
         _, meta_path = self._get_cache_path(key)
@@ -208,15 +485,16 @@ class DataCache:
     
     def list_all(self) -> List[Dict]:
         """Lista todos os caches com seus metadados"""
-        caches = []
-        for meta_file in self.cache_dir.glob("*_meta.json"):
-            try:
-                with open(meta_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                    caches.append(metadata)
-            except Exception as e:
-                logger.warning(f"Erro ao ler {meta_file}: {e}")
-        return caches
+        if not self._index_path.exists():
+            self._update_index()
+        return list(self._read_index().values())
+    
+    def remove(self, key: str):
+        """Remove um cache (dados, metadados e entrada do índice)"""
+        data_path, meta_path = self._get_cache_path(key)
+        data_path.unlink(missing_ok=True)
+        meta_path.unlink(missing_ok=True)
+        self._update_index(key, None)
     
     def clear(self):
         """Limpa todo o cache"""
@@ -224,6 +502,7 @@ class DataCache:
             cache_file.unlink()
         for meta_file in self.cache_dir.glob("*_meta.json"):
             meta_file.unlink()
+        self._index_path.unlink(missing_ok=True)
         logger.info("Cache limpo completamente")
     
     def get_cache_info(self) -> Dict:
@@ -244,6 +523,54 @@ class DataCache:
         }
 
 
+# Tabelas de códigos do modo demonstração: os sorteios geram índices
+# inteiros que são convertidos em categorias por indexação ou, nas colunas
+# categóricas, usados diretamente como códigos (Categorical.from_codes)
+_DEMO_DIGITOS = np.array([str(i) for i in range(11)], dtype=object)  # '0'..'10'
+_DEMO_OCUPACAO = np.array(['', '99999'], dtype=object)
+_DEMO_ASSISTENCIA = np.array([1, 2, 9], dtype=np.int8)
+_DEMO_SEXO = pd.CategoricalDtype(['M', 'F'])
+_DEMO_SEXO_SINASC = pd.CategoricalDtype(['M', 'F', 'I'])
+_DEMO_RACA = pd.CategoricalDtype(['1', '2', '3', '4', '5'])
+_DEMO_CODIGOS_1_9 = pd.CategoricalDtype(['1', '2', '3', '4', '5', '9'])
+_DEMO_CODIGOS_0_9 = pd.CategoricalDtype(['0', '1', '2', '3', '4', '5', '9'])
+_DEMO_EVOLUCAO = pd.CategoricalDtype(['1', '2', '3', '4', '9'])
+_DEMO_TIPO_PARTO = pd.CategoricalDtype(['1', '2', '9'])
+_DEMO_CAUSAS = pd.CategoricalDtype(CIDS_PRINCIPAIS[:8])
+_DEMO_DOENCAS = pd.CategoricalDtype(list(DOENCAS_SINAN.keys())[:8])
+_DEMO_RACA_P = [0.4, 0.1, 0.02, 0.45, 0.03]
+
+
+def _filtrar_municipio(resultado, coluna: str) -> pd.DataFrame:
+    """
+    Filtra o retorno de um download do PySUS para Arcoverde
+    
+    Versões recentes do PySUS retornam o(s) Parquet(s) gravado(s) em disco
+    (caminho ou objeto com `.path`); nesse caso o filtro é aplicado na
+    leitura e só os row groups com o município são descomprimidos.
+    Versões antigas retornam um DataFrame, filtrado em memória.
+    """
+    codigo = str(MUNICIPIO['codigo_ibge'])
+    if isinstance(resultado, pd.DataFrame):
+        municipios = resultado[coluna]
+        if not isinstance(municipios.dtype, pd.CategoricalDtype):
+            return resultado[municipios == codigo]
+        
+        # Coluna já categórica: compara os códigos inteiros, sem tocar nas strings
+        categorias = municipios.cat.categories
+        if codigo not in categorias:
+            return resultado.iloc[0:0]
+        return resultado[municipios.cat.codes.to_numpy() == categorias.get_loc(codigo)]
+    
+    if isinstance(resultado, (list, tuple)):
+        caminhos = [str(getattr(r, 'path', r)) for r in resultado]
+    else:
+        caminhos = str(getattr(resultado, 'path', resultado))
+    
+    tabela = pads.dataset(caminhos, format='parquet').to_table(filter=pc.field(coluna) == codigo)
+    return tabela.to_pandas()
+
+
 class PySUSDataLoader:
     """Carregador de dados do PySUS"""
     
@@ -259,14 +586,17 @@ class PySUSDataLoader:
         }
         
     def _check_pysus(self) -> bool:
-        """Verifica se PySUS está disponível"""
-        try:
-            import pysus
-            logger.info(f"PySUS versão {pysus.__version__} disponível")
+        """
+        Verifica se PySUS está disponível
+        
+        Só localiza o pacote (find_spec), sem importá-lo: o PySUS e suas
+        dependências são carregados apenas no primeiro download.
+        """
+        if importlib.util.find_spec('pysus') is not None:
+            logger.info("PySUS disponível")
             return True
-        except ImportError:
-            logger.warning("PySUS não instalado.")
-            return False
+        logger.warning("PySUS não instalado.")
+        return False
     
     def _generate_simulated_data(self, sistema: str, ano: int) -> pd.DataFrame:
         """
@@ -277,68 +607,81 @@ class PySUSDataLoader:
         """
         logger.warning(f"[MODO DEMONSTRAÇÃO] Gerando dados simulados para {sistema} - {ano}")
         
-        np.random.seed(ano + hash(sistema) % 10000)
-        n_records = np.random.randint(50, 500)
+        # Gerador local (PCG64), seguro entre threads
+        rng = np.random.default_rng(ano + abs(hash(sistema)) % 10000)
+        n_records = int(rng.integers(50, 500))
         
         if sistema == "SIM":
+            # mes, sexo, escolaridade, estado_civil, causa_basica em um único sorteio
+            u = rng.integers(0, [12, 2, 6, 6, 8], size=(n_records, 5))
             data = {
-                'ano': [ano] * n_records,
-                'mes': np.random.randint(1, 13, n_records),
-                'sexo': np.random.choice(['M', 'F'], n_records),
-                'idade': np.random.exponential(45, n_records).astype(int),
-                'raca_cor': np.random.choice(['1', '2', '3', '4', '5'], n_records, p=[0.4, 0.1, 0.02, 0.45, 0.03]),
-                'escolaridade': np.random.choice(['1', '2', '3', '4', '5', '9'], n_records),
-                'estado_civil': np.random.choice(['1', '2', '3', '4', '5', '9'], n_records),
-                'causa_basica': np.random.choice(CIDS_PRINCIPAIS[:8], n_records),
-                'ocupacao': np.random.choice(['', '99999'], n_records, p=[0.7, 0.3]),
-                'local_obito': np.random.choice([1, 2, 3, 4, 5], n_records, p=[0.5, 0.3, 0.1, 0.05, 0.05]),
-                'assistencia_medica': np.random.choice([1, 2, 9], n_records, p=[0.8, 0.15, 0.05]),
+                'ano': np.full(n_records, ano, dtype=np.int16),
+                'mes': (u[:, 0] + 1).astype(np.int8),
+                'sexo': pd.Categorical.from_codes(u[:, 1], dtype=_DEMO_SEXO),
+                'idade': np.clip(rng.exponential(45, n_records), 0, 127).astype(np.int8),
+                'raca_cor': pd.Categorical.from_codes(rng.choice(5, n_records, p=_DEMO_RACA_P), dtype=_DEMO_RACA),
+                'escolaridade': pd.Categorical.from_codes(u[:, 2], dtype=_DEMO_CODIGOS_1_9),
+                'estado_civil': pd.Categorical.from_codes(u[:, 3], dtype=_DEMO_CODIGOS_1_9),
+                'causa_basica': pd.Categorical.from_codes(u[:, 4], dtype=_DEMO_CAUSAS),
+                'ocupacao': _DEMO_OCUPACAO[rng.choice(2, n_records, p=[0.7, 0.3])],
+                'local_obito': (rng.choice(5, n_records, p=[0.5, 0.3, 0.1, 0.05, 0.05]) + 1).astype(np.int8),
+                'assistencia_medica': _DEMO_ASSISTENCIA[rng.choice(3, n_records, p=[0.8, 0.15, 0.05])],
             }
         elif sistema == "SINAN":
-            doencas = list(DOENCAS_SINAN.keys())[:8]
+            # mes, semana_notificacao, sexo, escolaridade, doenca em um único sorteio
+            u = rng.integers(0, [12, 52, 2, 7, len(_DEMO_DOENCAS.categories)], size=(n_records, 5))
             data = {
-                'ano': [ano] * n_records,
-                'mes': np.random.randint(1, 13, n_records),
-                'semana_notificacao': np.random.randint(1, 53, n_records),
-                'sexo': np.random.choice(['M', 'F'], n_records),
-                'idade': np.random.exponential(35, n_records).astype(int),
-                'raca_cor': np.random.choice(['1', '2', '3', '4', '5'], n_records, p=[0.4, 0.1, 0.02, 0.45, 0.03]),
-                'escolaridade': np.random.choice(['0', '1', '2', '3', '4', '5', '9'], n_records),
-                'doenca': np.random.choice(doencas, n_records),
-                'evolucao': np.random.choice(['1', '2', '3', '4', '9'], n_records, p=[0.7, 0.15, 0.05, 0.05, 0.05]),
-                'encerramento': np.random.choice([1, 2], n_records, p=[0.9, 0.1]),
+                'ano': np.full(n_records, ano, dtype=np.int16),
+                'mes': (u[:, 0] + 1).astype(np.int8),
+                'semana_notificacao': (u[:, 1] + 1).astype(np.int8),
+                'sexo': pd.Categorical.from_codes(u[:, 2], dtype=_DEMO_SEXO),
+                'idade': np.clip(rng.exponential(35, n_records), 0, 127).astype(np.int8),
+                'raca_cor': pd.Categorical.from_codes(rng.choice(5, n_records, p=_DEMO_RACA_P), dtype=_DEMO_RACA),
+                'escolaridade': pd.Categorical.from_codes(u[:, 3], dtype=_DEMO_CODIGOS_0_9),
+                'doenca': pd.Categorical.from_codes(u[:, 4], dtype=_DEMO_DOENCAS),
+                'evolucao': pd.Categorical.from_codes(
+                    rng.choice(5, n_records, p=[0.7, 0.15, 0.05, 0.05, 0.05]), dtype=_DEMO_EVOLUCAO
+                ),
+                'encerramento': (rng.choice(2, n_records, p=[0.9, 0.1]) + 1).astype(np.int8),
             }
         elif sistema == "SINASC":
+            # mes, escolaridade_mae, consultas_pre_natal, apgar_1, apgar_5 em um único sorteio
+            u = rng.integers(0, [12, 6, 9, 11, 11], size=(n_records, 5))
             data = {
-                'ano': [ano] * n_records,
-                'mes': np.random.randint(1, 13, n_records),
-                'sexo': np.random.choice(['M', 'F', 'I'], n_records, p=[0.51, 0.48, 0.01]),
-                'peso': np.random.normal(3200, 500, n_records).astype(int),
-                'gestacao_semanas': np.random.normal(38, 2, n_records).astype(int),
-                'idade_mae': np.random.normal(27, 7, n_records).astype(int),
-                'raca_cor_mae': np.random.choice(['1', '2', '3', '4', '5'], n_records, p=[0.4, 0.1, 0.02, 0.45, 0.03]),
-                'escolaridade_mae': np.random.choice(['0', '1', '2', '3', '4', '5'], n_records),
-                'consultas_pre_natal': np.random.choice(['1', '2', '3', '4', '5', '6', '7', '8', '9'], n_records),
-                'tipo_parto': np.random.choice(['1', '2', '9'], n_records, p=[0.6, 0.35, 0.05]),
-                'apgar_1': np.random.choice(['0', '1', '2', '3', '4', '5', '6', '7', '8', '9', '10'], n_records),
-                'apgar_5': np.random.choice(['0', '1', '2', '3', '4', '5', '6', '7', '8', '9', '10'], n_records),
+                'ano': np.full(n_records, ano, dtype=np.int16),
+                'mes': (u[:, 0] + 1).astype(np.int8),
+                'sexo': pd.Categorical.from_codes(rng.choice(3, n_records, p=[0.51, 0.48, 0.01]), dtype=_DEMO_SEXO_SINASC),
+                'peso': np.clip(rng.normal(3200, 500, n_records), 0, 32767).astype(np.int16),
+                'gestacao_semanas': rng.normal(38, 2, n_records).astype(np.int8),
+                'idade_mae': rng.normal(27, 7, n_records).astype(np.int8),
+                'raca_cor_mae': pd.Categorical.from_codes(rng.choice(5, n_records, p=_DEMO_RACA_P), dtype=_DEMO_RACA),
+                'escolaridade_mae': _DEMO_DIGITOS[u[:, 1]],
+                'consultas_pre_natal': _DEMO_DIGITOS[u[:, 2] + 1],
+                'tipo_parto': pd.Categorical.from_codes(rng.choice(3, n_records, p=[0.6, 0.35, 0.05]), dtype=_DEMO_TIPO_PARTO),
+                'apgar_1': u[:, 3].astype(np.int8),
+                'apgar_5': u[:, 4].astype(np.int8),
             }
         else:
             data = {}
+            n_records = 0
         
-        df = pd.DataFrame(data)
-        df['codigo_municipio'] = MUNICIPIO['codigo_ibge']
-        df['municipio'] = MUNICIPIO['nome']
-        df['uf'] = MUNICIPIO['uf']
-        df['_demo_data'] = True  # Flag para identificar dados simulados
+        # Constantes entram no mesmo dicionário: o DataFrame é construído
+        # uma única vez, com um bloco contíguo por tipo (sem inserções depois)
+        data['codigo_municipio'] = np.full(n_records, MUNICIPIO['codigo_ibge'], dtype=np.int32)
+        data['municipio'] = np.full(n_records, MUNICIPIO['nome'], dtype=object)
+        data['uf'] = np.full(n_records, MUNICIPIO['uf'], dtype=object)
+        data['_demo_data'] = np.ones(n_records, dtype=bool)  # Flag para identificar dados simulados
         
-        return df
+        return pd.DataFrame(data)
     
     def _handle_pysus_error(self, sistema: str, ano: int, error: Exception) -> pd.DataFrame:
         """
         Trata erros do PySUS de acordo com o modo de operação
         
-        Em produção: levanta exceção para não mascarar erros
+        Em produção: levanta exceção para não mascarar erros. Falhas de rede
+        (ERROS_REDE) viram ConnectionError encadeado ao erro original; as
+        demais (PySUS ausente, ano não publicado, parsing) propagam sem
+        alteração.
         Em demonstração: retorna dados simulados com aviso
         """
         error_msg = str(error)
@@ -349,15 +692,24 @@ class PySUSDataLoader:
             return self._generate_simulated_data(sistema, ano)
         else:
             # Em produção, não usar dados simulados silenciosamente
+            if not isinstance(error, ERROS_REDE):
+                raise error
             raise ConnectionError(
                 f"Falha na conexão com PySUS para {sistema} ({ano}). "
                 f"Erro: {error_msg}. "
                 f"Verifique a conexão com a internet e a disponibilidade do DATASUS."
-            )
+            ) from error
+    
+    @staticmethod
+    def _cache_key(sistema: str, ano: int, doenca: str = None) -> str:
+        """Chave de cache de um sistema/ano"""
+        if sistema == "SINAN":
+            return f"sinan_{MUNICIPIO['codigo_ibge']}_{ano}_{doenca or 'all'}"
+        return f"{sistema.lower()}_{MUNICIPIO['codigo_ibge']}_{ano}"
     
     def get_sim_data(self, ano: int, force_refresh: bool = False) -> pd.DataFrame:
         """Obtém dados do SIM (Sistema de Informação sobre Mortalidade)"""
-        cache_key = f"sim_{MUNICIPIO['codigo_ibge']}_{ano}"
+        cache_key = self._cache_key("SIM", ano)
         
         if not force_refresh:
             cached = self.cache.get(cache_key)
@@ -373,16 +725,14 @@ class PySUSDataLoader:
             if self._pysus_available:
                 from pysus.online_data.SIM import download
                 # Download para o estado de Pernambuco
-                df = download(MUNICIPIO['uf'], ano)
-                # Filtrar para Arcoverde
-                df = df[df['CODMUNOCOR'] == str(MUNICIPIO['codigo_ibge'])]
+                df = _filtrar_municipio(download(MUNICIPIO['uf'], ano), 'CODMUNOCOR')
                 source = 'pysus'
             else:
                 if self._demo_mode:
                     df = self._generate_simulated_data("SIM", ano)
                     source = 'simulated'
                 else:
-                    raise ConnectionError("PySUS não disponível e modo demonstração desativado.")
+                    raise RuntimeError("PySUS não disponível e modo demonstração desativado.")
             
             self.cache.set(cache_key, df, source=source)
             self._last_update_info = {
@@ -397,7 +747,7 @@ class PySUSDataLoader:
     
     def get_sinan_data(self, ano: int, doenca: str = None, force_refresh: bool = False) -> pd.DataFrame:
         """Obtém dados do SINAN (Sistema de Informação de Agravos de Notificação)"""
-        cache_key = f"sinan_{MUNICIPIO['codigo_ibge']}_{ano}_{doenca or 'all'}"
+        cache_key = self._cache_key("SINAN", ano, doenca)
         
         if not force_refresh:
             cached = self.cache.get(cache_key)
@@ -413,19 +763,18 @@ class PySUSDataLoader:
             if self._pysus_available:
                 from pysus.online_data.SINAN import download
                 if doenca:
-                    df = download(doenca, ano)
+                    resultado = download(doenca, ano)
                 else:
                     # Download de doença mais comum como exemplo
-                    df = download("DENGUE", ano)
-                # Filtrar para Arcoverde
-                df = df[df['ID_MUNICIP'] == str(MUNICIPIO['codigo_ibge'])]
+                    resultado = download("DENGUE", ano)
+                df = _filtrar_municipio(resultado, 'ID_MUNICIP')
                 source = 'pysus'
             else:
                 if self._demo_mode:
                     df = self._generate_simulated_data("SINAN", ano)
                     source = 'simulated'
                 else:
-                    raise ConnectionError("PySUS não disponível e modo demonstração desativado.")
+                    raise RuntimeError("PySUS não disponível e modo demonstração desativado.")
             
             self.cache.set(cache_key, df, source=source)
             self._last_update_info = {
@@ -440,7 +789,7 @@ class PySUSDataLoader:
     
     def get_sinasc_data(self, ano: int, force_refresh: bool = False) -> pd.DataFrame:
         """Obtém dados do SINASC (Sistema de Informações sobre Nascidos Vivos)"""
-        cache_key = f"sinasc_{MUNICIPIO['codigo_ibge']}_{ano}"
+        cache_key = self._cache_key("SINASC", ano)
         
         if not force_refresh:
             cached = self.cache.get(cache_key)
@@ -455,16 +804,14 @@ class PySUSDataLoader:
         try:
             if self._pysus_available:
                 from pysus.online_data.SINASC import download
-                df = download(MUNICIPIO['uf'], ano)
-                # Filtrar para Arcoverde
-                df = df[df['CODMUNNASC'] == str(MUNICIPIO['codigo_ibge'])]
+                df = _filtrar_municipio(download(MUNICIPIO['uf'], ano), 'CODMUNNASC')
                 source = 'pysus'
             else:
                 if self._demo_mode:
                     df = self._generate_simulated_data("SINASC", ano)
                     source = 'simulated'
                 else:
-                    raise ConnectionError("PySUS não disponível e modo demonstração desativado.")
+                    raise RuntimeError("PySUS não disponível e modo demonstração desativado.")
             
             self.cache.set(cache_key, df, source=source)
             self._last_update_info = {
@@ -478,32 +825,86 @@ class PySUSDataLoader:
             return self._handle_pysus_error("SINASC", ano, e)
     
     def get_multi_years_data(self, sistema: str, anos: List[int], **kwargs) -> pd.DataFrame:
-        """Obtém dados de múltiplos anos e concatena"""
-        dfs = []
+        """
+        Obtém dados de múltiplos anos e concatena
         
-        for ano in anos:
-            try:
-                if sistema.upper() == "SIM":
-                    df = self.get_sim_data(ano, **kwargs)
-                elif sistema.upper() == "SINAN":
-                    df = self.get_sinan_data(ano, **kwargs)
-                elif sistema.upper() == "SINASC":
-                    df = self.get_sinasc_data(ano, **kwargs)
-                else:
-                    continue
-                
-                if df is not None and len(df) > 0:
-                    dfs.append(df)
-                    
-            except Exception as e:
-                logger.error(f"Erro ao carregar {sistema} para {ano}: {e}")
-                # Em modo não-demo, propagar o erro
-                if not self._demo_mode:
-                    raise
+        Se todos os anos estiverem em cache, são lidos de uma vez
+        (DataCache.get_many). Caso contrário, os anos são carregados em
+        paralelo (cada download é limitado por rede, não por CPU).
+        O resultado mantém a ordem de `anos`.
+        """
+        carregadores = {
+            "SIM": self.get_sim_data,
+            "SINAN": self.get_sinan_data,
+            "SINASC": self.get_sinasc_data
+        }
+        carregar = carregadores.get(sistema.upper())
+        if carregar is None or not anos:
+            return pd.DataFrame()
+        
+        # Caminho rápido: todos os anos em cache, lidos de uma vez
+        if not kwargs.get('force_refresh'):
+            chaves = [self._cache_key(sistema.upper(), ano, kwargs.get('doenca')) for ano in anos]
+            em_cache = self.cache.get_many(chaves)
+            if em_cache is not None:
+                self._last_update_info = {
+                    'timestamp': datetime.now(),
+                    'source': 'cache',
+                    'status': 'success'
+                }
+                return em_cache
+        
+        dfs = {}
+        
+        with ThreadPoolExecutor(max_workers=min(8, len(anos))) as executor:
+            futuros = {executor.submit(carregar, ano, **kwargs): ano for ano in anos}
+            
+            for futuro in as_completed(futuros):
+                ano = futuros[futuro]
+                try:
+                    df = futuro.result()
+                    if df is not None and len(df) > 0:
+                        dfs[ano] = df
+                        
+                except Exception as e:
+                    logger.error(f"Erro ao carregar {sistema} para {ano}: {e}")
+                    # Em modo não-demo, propagar o erro (sem iniciar os anos pendentes)
+                    if not self._demo_mode:
+                        for pendente in futuros:
+                            pendente.cancel()
+                        raise
+        
+        if not dfs:
+            return pd.DataFrame()
+        
+        # Alinhar todos os anos ao mesmo esquema (união das colunas, na ordem
+        # em que aparecem pela primeira vez), para que a concatenação junte
+        # blocos do mesmo tipo sem reordenar
+        frames = [dfs[ano] for ano in anos if ano in dfs]
+        colunas = list(dict.fromkeys(c for f in frames for c in f.columns))
         
-        if dfs:
-            return pd.concat(dfs, ignore_index=True)
-        return pd.DataFrame()
+        # Colunas categóricas recebem a união das categorias de todos os anos;
+        # sem isso, categorias diferentes (ou a coluna ausente em algum ano,
+        # preenchida com NaN float) fariam o concat voltar para object
+        categoricas = {}
+        for coluna in colunas:
+            tipos = [f[coluna].dtype for f in frames if coluna in f.columns]
+            if all(isinstance(t, pd.CategoricalDtype) for t in tipos):
+                categorias = list(dict.fromkeys(c for t in tipos for c in t.categories))
+                categoricas[coluna] = pd.CategoricalDtype(categorias)
+        
+        alinhados = []
+        for f in frames:
+            if list(f.columns) != colunas:
+                f = f.reindex(columns=colunas)
+            conversoes = {c: t for c, t in categoricas.items() if f[c].dtype != t}
+            alinhados.append(f.astype(conversoes) if conversoes else f)
+        return pd.concat(alinhados, ignore_index=True, copy=False, sort=False)
+    
+    def get_rowcount(self, sistema: str, ano: int, doenca: str = None,
+                     desde: Optional[float] = None) -> Optional[int]:
+        """Registros em cache de um sistema/ano, sem carregar os dados"""
+        return self.cache.count_rows(self._cache_key(sistema.upper(), ano, doenca), desde=desde)
     
     def get_last_update_info(self) -> Dict:
         """Retorna informações sobre a última atualização"""
@@ -537,12 +938,40 @@ def set_demo_mode(enabled: bool = True):
 
 # Funções auxiliares para processamento de dados
 
-def calcular_faixa_etaria(idade: int) -> str:
-    """Calcula a faixa etária a partir da idade"""
-    for faixa, (min_idade, max_idade) in FAIXAS_ETARIAS.items():
-        if min_idade <= idade <= max_idade:
-            return faixa
-    return "Não informado"
+# Mapeamento simplificado de CIDs (primeira letra -> capítulo, descrição)
+_CID_MAP = {
+    'A': ('I', 'Algumas doenças infecciosas e parasitárias'),
+    'B': ('I', 'Algumas doenças infecciosas e parasitárias'),
+    'C': ('II', 'Neoplasias'),
+    'D': ('II', 'Neoplasias e doenças do sangue'),
+    'E': ('IV', 'Doenças endócrinas, nutricionais e metabólicas'),
+    'F': ('V', 'Transtornos mentais e comportamentais'),
+    'G': ('VI', 'Doenças do sistema nervoso'),
+    'H': ('VII-VIII', 'Doenças do olho e ouvido'),
+    'I': ('IX', 'Doenças do aparelho circulatório'),
+    'J': ('X', 'Doenças do aparelho respiratório'),
+    'K': ('XI', 'Doenças do aparelho digestivo'),
+    'L': ('XII', 'Doenças da pele'),
+    'M': ('XIII', 'Doenças do sistema osteomuscular'),
+    'N': ('XIV', 'Doenças do aparelho geniturinário'),
+    'O': ('XV', 'Gravidez, parto e puerpério'),
+    'P': ('XVI', 'Afecções originadas no período perinatal'),
+    'Q': ('XVII', 'Malformações congênitas'),
+    'R': ('XVIII', 'Sintomas e achados anormais'),
+    'S': ('XIX', 'Lesões, envenenamentos'),
+    'T': ('XIX', 'Lesões, envenenamentos'),
+    'V': ('XX', 'Causas externas'),
+    'W': ('XX', 'Causas externas'),
+    'X': ('XX', 'Causas externas'),
+    'Y': ('XX', 'Causas externas'),
+}
+_CID_OUTRAS = ('XXI', 'Outras condições')
+
+# Versões em array do mapeamento para processar_cid_frame
+# (o último elemento corresponde a letras fora do mapeamento)
+_CID_LETRAS = list(_CID_MAP.keys())
+_CID_CAPITULOS = np.array([cap for cap, _ in _CID_MAP.values()] + [_CID_OUTRAS[0]], dtype=object)
+_CID_DESCRICOES = np.array([desc for _, desc in _CID_MAP.values()] + [_CID_OUTRAS[1]], dtype=object)
 
 
 def processar_cid(codigo: str) -> Dict:
@@ -550,36 +979,8 @@ def processar_cid(codigo: str) -> Dict:
     if pd.isna(codigo) or codigo == '':
         return {'capitulo': 'Não informado', 'descricao': 'Não informado'}
     
-    # Mapeamento simplificado de CIDs
-    cid_map = {
-        'A': ('I', 'Algumas doenças infecciosas e parasitárias'),
-        'B': ('I', 'Algumas doenças infecciosas e parasitárias'),
-        'C': ('II', 'Neoplasias'),
-        'D': ('II', 'Neoplasias e doenças do sangue'),
-        'E': ('IV', 'Doenças endócrinas, nutricionais e metabólicas'),
-        'F': ('V', 'Transtornos mentais e comportamentais'),
-        'G': ('VI', 'Doenças do sistema nervoso'),
-        'H': ('VII-VIII', 'Doenças do olho e ouvido'),
-        'I': ('IX', 'Doenças do aparelho circulatório'),
-        'J': ('X', 'Doenças do aparelho respiratório'),
-        'K': ('XI', 'Doenças do aparelho digestivo'),
-        'L': ('XII', 'Doenças da pele'),
-        'M': ('XIII', 'Doenças do sistema osteomuscular'),
-        'N': ('XIV', 'Doenças do aparelho geniturinário'),
-        'O': ('XV', 'Gravidez, parto e puerpério'),
-        'P': ('XVI', 'Afecções originadas no período perinatal'),
-        'Q': ('XVII', 'Malformações congênitas'),
-        'R': ('XVIII', 'Sintomas e achados anormais'),
-        'S': ('XIX', 'Lesões, envenenamentos'),
-        'T': ('XIX', 'Lesões, envenenamentos'),
-        'V': ('XX', 'Causas externas'),
-        'W': ('XX', 'Causas externas'),
-        'X': ('XX', 'Causas externas'),
-        'Y': ('XX', 'Causas externas'),
-    }
-    
     primeira_letra = str(codigo)[0].upper() if codigo else ''
-    info = cid_map.get(primeira_letra, ('XXI', 'Outras condições'))
+    info = _CID_MAP.get(primeira_letra, _CID_OUTRAS)
     
     return {
         'capitulo': info[0],
@@ -588,6 +989,33 @@ def processar_cid(codigo: str) -> Dict:
     }
 
 
+def processar_cid_frame(codigos: pd.Series) -> pd.DataFrame:
+    """
+    Processa uma coluna inteira de códigos CID
+    
+    Versão vetorizada de processar_cid: extrai a primeira letra de todos os
+    códigos de uma vez e busca capítulo/descrição por índice. Retorna um
+    DataFrame com as colunas 'capitulo', 'descricao' e 'codigo_original',
+    alinhado ao índice de `codigos`.
+    """
+    texto = codigos.astype('string')
+    letras = texto.str[0].str.upper()
+    
+    indices = pd.Categorical(letras, categories=_CID_LETRAS).codes
+    indices = np.where(indices < 0, len(_CID_LETRAS), indices)
+    
+    resultado = pd.DataFrame({
+        'capitulo': _CID_CAPITULOS[indices],
+        'descricao': _CID_DESCRICOES[indices],
+        'codigo_original': codigos.to_numpy()
+    }, index=codigos.index)
+    
+    ausentes = (texto.isna() | (texto == '')).to_numpy(dtype=bool, na_value=True)
+    resultado.loc[ausentes, ['capitulo', 'descricao']] = 'Não informado'
+    
+    return resultado
+
+
 def agregar_por_periodo(df: pd.DataFrame, coluna_data: str = 'mes', 
                         coluna_valor: str = None) -> pd.DataFrame:
     """Agrega dados por período"""
@@ -599,5 +1027,11 @@ def agregar_por_periodo(df: pd.DataFrame, coluna_data: str = 'mes',
 def calcular_taxas(df: pd.DataFrame, populacao: int, 
                    coluna_contagem: str = 'quantidade') -> pd.DataFrame:
     """Calcula taxas por 100.000 habitantes"""
-    df['taxa_100mil'] = (df[coluna_contagem] / populacao) * 100000
+    df['taxa_100mil'] = calcular_taxas_array(df[coluna_contagem].to_numpy(), populacao)
     return df
+
+
+def calcular_taxas_array(contagens: np.ndarray, populacao: int) -> np.ndarray:
+    """Taxas por 100.000 habitantes (float32) para um array de contagens"""
+    escala = np.float32(100000.0 / populacao)
+    return np.multiply(contagens, escala, out=np.empty(np.shape(contagens), dtype=np.float32))
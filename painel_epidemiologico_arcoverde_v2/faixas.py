@@ -0,0 +1,42 @@
+"""
+Classificação de idades nas faixas etárias padrão (config.FAIXAS_ETARIAS)
+
+Módulo leve (apenas config, NumPy e pandas): pode ser importado tanto pelo
+carregamento de dados quanto pelos gráficos.
+"""
+
+import numpy as np
+import pandas as pd
+
+from config import FAIXAS_ETARIAS
+
+NAO_INFORMADO = "Não informado"
+
+# Limites das faixas etárias para classificação vetorizada
+# (as faixas de FAIXAS_ETARIAS são contíguas e ordenadas)
+_FAIXA_LABELS = list(FAIXAS_ETARIAS.keys())
+_FAIXA_BINS = np.array(
+    [min_idade for min_idade, _ in FAIXAS_ETARIAS.values()]
+    + [list(FAIXAS_ETARIAS.values())[-1][1] + 1]
+)
+
+
+def calcular_faixa_etaria(idade: int) -> str:
+    """Calcula a faixa etária a partir da idade"""
+    indice = int(np.searchsorted(_FAIXA_BINS, idade, side='right')) - 1
+    if 0 <= indice < len(_FAIXA_LABELS):
+        return _FAIXA_LABELS[indice]
+    return NAO_INFORMADO
+
+
+def calcular_faixas_etarias(idades) -> pd.Series:
+    """
+    Calcula a faixa etária de uma coluna inteira de idades
+
+    Versão vetorizada de calcular_faixa_etaria (pd.cut sobre os mesmos
+    limites, sem laço Python por linha). Retorna uma Series categórica;
+    idades ausentes, não numéricas ou fora das faixas recebem "Não informado".
+    """
+    idades = pd.to_numeric(pd.Series(idades), errors='coerce')
+    faixas = pd.cut(idades, bins=_FAIXA_BINS, right=False, labels=_FAIXA_LABELS)
+    return faixas.cat.add_categories(NAO_INFORMADO).fillna(NAO_INFORMADO)
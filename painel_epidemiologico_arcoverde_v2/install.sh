@@ -177,6 +177,8 @@ sys.path.insert(0, '.')
 try:
     import config
     print("✓ config.py")
+    import faixas
+    print("✓ faixas.py")
     import data_loader
     print("✓ data_loader.py")
     import visualizations
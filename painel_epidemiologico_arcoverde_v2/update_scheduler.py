@@ -22,22 +22,29 @@ Exemplo de cron com ambiente virtual:
 0 3 * * 0 cd /caminho/do/dashboard && /caminho/do/dashboard/venv/bin/python update_scheduler.py --manual
 """
 
-import schedule
 import time
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
 import threading
+from collections import deque
+from typing import Optional, Tuple
+from functools import lru_cache
 import subprocess
 import sys
 import os
+import json
+import signal
+import fcntl
+from contextlib import contextmanager
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Configurar path para importar módulos do projeto
 script_dir = Path(__file__).parent
 sys.path.insert(0, str(script_dir))
 
-from config import ATUALIZACAO, DATA_DIR, CACHE_DIR
-from data_loader import data_loader, DataCache
+from config import ATUALIZACAO, DATA_DIR, CACHE_DIR, LOGS_DIR
 
 # Configuração de logging
 logging.basicConfig(
@@ -50,6 +57,121 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Dia configurado (ATUALIZACAO['dia_semana']) -> datetime.weekday() (segunda = 0)
+DIAS_SEMANA = {
+    'segunda': 0, 'terca': 1, 'quarta': 2, 'quinta': 3,
+    'sexta': 4, 'sabado': 5, 'domingo': 6
+}
+
+# Histórico completo das atualizações (um registro JSON por linha)
+HISTORICO_PATH = LOGS_DIR / "update_history.jsonl"
+
+# Auditoria: uma linha JSON por ciclo, fora do log legível
+audit_logger = logging.getLogger(f"{__name__}.audit")
+audit_logger.setLevel(logging.INFO)
+audit_logger.propagate = False
+_audit_handler = logging.FileHandler(HISTORICO_PATH, encoding='utf-8')
+_audit_handler.setFormatter(logging.Formatter('%(message)s'))
+audit_logger.addHandler(_audit_handler)
+
+# Downloads simultâneos na atualização (sistemas × anos); SIM, SINAN e
+# SINASC vêm de diretórios distintos do DATASUS e se sobrepõem bem
+MAX_DOWNLOADS_PARALELOS = 12
+
+# Novas tentativas por ano em falhas transitórias (espera 1s, 2s, 4s... até o máximo)
+MAX_TENTATIVAS = 3
+ESPERA_MAXIMA = 30
+ERROS_TRANSITORIOS = (ConnectionError, TimeoutError)
+
+# Validade (s) da verificação de disponibilidade do PySUS em get_status
+PYSUS_CACHE_TTL = 30
+
+# Trava entre processos (cron --manual x daemon) para um único escritor no cache
+LOCK_PATH = CACHE_DIR / ".update.lock"
+
+# Sinalizado por SIGINT/SIGTERM para encerrar o daemon
+_stop_event = threading.Event()
+
+# Espera máxima (s) por uma atualização em andamento ao parar o daemon
+ESPERA_PARADA = 10
+
+
+def _data_loader():
+    """
+    Retorna o carregador global, importando data_loader sob demanda
+    
+    O import traz pandas/pyarrow (e o PySUS no primeiro download); comandos
+    leves como --status não precisam pagar esse custo.
+    """
+    from data_loader import data_loader
+    return data_loader
+
+
+def _contar_registros(sistema: str, carregar, ano: int) -> Tuple[int, int]:
+    """
+    Atualiza um ano e retorna (quantidade de registros, tentativas)
+    
+    O DataFrame não sai da thread de trabalho: o futuro guarda apenas
+    inteiros, então cada ano pode ser liberado assim que é gravado no cache.
+    A contagem vem do rodapé do Parquet recém-gravado.
+    
+    Falhas transitórias (conexão/timeout do FTP do DATASUS) são repetidas
+    até MAX_TENTATIVAS vezes, com espera exponencial; as demais propagam
+    na primeira ocorrência. A exceção propagada leva em `tentativas` o
+    número de tentativas feitas.
+    """
+    for tentativa in range(1, MAX_TENTATIVAS + 1):
+        inicio = time.time()
+        try:
+            df = carregar(ano, force_refresh=True)
+            break
+        except ERROS_TRANSITORIOS as e:
+            if tentativa == MAX_TENTATIVAS:
+                e.tentativas = tentativa
+                raise
+            espera = min(ESPERA_MAXIMA, 2 ** (tentativa - 1))
+            logger.warning("  ↻ %s %s: tentativa %d falhou (%s), nova tentativa em %ss",
+                           sistema, ano, tentativa, e, espera)
+            time.sleep(espera)
+        except Exception as e:
+            # Erro permanente (PySUS ausente, ano não publicado, parsing)
+            e.tentativas = tentativa
+            raise
+    
+    registros = _data_loader().get_rowcount(sistema, ano, desde=inicio)
+    if registros is None:
+        # Nada gravado no cache nesta chamada (ex.: dados simulados após falha)
+        registros = len(df) if df is not None else 0
+    return registros, tentativa
+
+
+@contextmanager
+def _update_lock():
+    """
+    Trava exclusiva não bloqueante em LOCK_PATH
+    
+    Produz True se a trava foi obtida, False se outro processo já está
+    atualizando. O PID do dono fica gravado no arquivo para diagnóstico.
+    """
+    with open(LOCK_PATH, 'a+') as lf:
+        try:
+            fcntl.flock(lf, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lf.seek(0)
+            dono = lf.read().strip() or '?'
+            logger.warning("Atualização já em andamento (PID %s), ignorando", dono)
+            yield False
+            return
+        try:
+            lf.seek(0)
+            lf.truncate()
+            lf.write(str(os.getpid()))
+            lf.flush()
+            yield True
+        finally:
+            lf.truncate(0)
+            fcntl.flock(lf, fcntl.LOCK_UN)
+
 
 class DataUpdateScheduler:
     """
@@ -70,9 +192,19 @@ class DataUpdateScheduler:
     def __init__(self):
         self.running = False
         self.thread = None
+        # Protege running/thread, lidos e escritos pela thread do timer e por stop()
+        self._lock = threading.Lock()
         self.last_update = None
         self.next_update = None
-        self.update_history = []  # Histórico de atualizações
+        # Histórico recente em memória (limitado); o completo fica em HISTORICO_PATH
+        self.update_history = deque(maxlen=ATUALIZACAO.get('historico_max', 52))
+        # (instante monotônico, disponível) da última verificação do PySUS
+        self._pysus_cache: Optional[Tuple[float, bool]] = None
+        
+        # Dia/horário alvo interpretados uma única vez
+        self._dia_alvo = DIAS_SEMANA.get(ATUALIZACAO['dia_semana'], DIAS_SEMANA['domingo'])
+        hora, minuto = ATUALIZACAO['hora'].split(':')
+        self._hora_alvo, self._minuto_alvo = int(hora), int(minuto)
         
     def update_all_data(self):
         """
@@ -89,10 +221,18 @@ class DataUpdateScheduler:
         COMPORTAMENTO EM FALHA:
         - Falha em um ano/sistema: Continua com os demais
         - Falha total: Registra erro, mantém cache existente
+        
+        Apenas um processo atualiza por vez (ver _update_lock).
         """
-        logger.info("=" * 60)
+        with _update_lock() as adquirido:
+            if adquirido:
+                self._atualizar_dados()
+    
+    def _atualizar_dados(self):
+        """Corpo de update_all_data, executado com a trava obtida"""
+        logger.debug("=" * 60)
         logger.info("INICIANDO ATUALIZAÇÃO DE DADOS")
-        logger.info("=" * 60)
+        logger.debug("=" * 60)
         
         update_record = {
             'timestamp': datetime.now(),
@@ -102,53 +242,70 @@ class DataUpdateScheduler:
         }
         
         try:
+            data_loader = _data_loader()
+            
             # Verificar disponibilidade do PySUS
             if not data_loader.is_pysus_available():
                 msg = "PySUS não disponível. Atualização abortada."
                 logger.error(msg)
                 update_record['errors'].append(msg)
                 update_record['status'] = 'failed'
-                self.update_history.append(update_record)
+                self._registrar_historico(update_record)
                 return
             
             ano_atual = datetime.now().year
             anos = list(range(2020, ano_atual + 1))
             
-            sistemas = ['SIM', 'SINAN', 'SINASC']
-            
-            for sistema in sistemas:
-                logger.info(f"Atualizando dados do {sistema}...")
-                sistema_record = {
+            carregadores = {
+                'SIM': data_loader.get_sim_data,
+                'SINAN': data_loader.get_sinan_data,
+                'SINASC': data_loader.get_sinasc_data
+            }
+            sistema_records = {
+                sistema: {
                     'anos_processados': 0,
                     'anos_com_erro': 0,
-                    'total_registros': 0
+                    'total_registros': 0,
+                    'tentativas': 0
+                }
+                for sistema in carregadores
+            }
+            
+            # Downloads são limitados por rede: todos os pares (sistema, ano)
+            # rodam em paralelo. Os contadores são atualizados só nesta thread.
+            logger.info("Atualizando dados de %s (%d anos cada)...", ', '.join(carregadores), len(anos))
+            with ThreadPoolExecutor(
+                max_workers=min(MAX_DOWNLOADS_PARALELOS, len(carregadores) * len(anos))
+            ) as executor:
+                futuros = {
+                    executor.submit(_contar_registros, sistema, carregar, ano): (sistema, ano)
+                    for sistema, carregar in carregadores.items()
+                    for ano in anos
                 }
                 
-                for ano in anos:
+                for futuro in as_completed(futuros):
+                    sistema, ano = futuros[futuro]
+                    sistema_record = sistema_records[sistema]
                     try:
-                        if sistema == 'SIM':
-                            df = data_loader.get_sim_data(ano, force_refresh=True)
-                        elif sistema == 'SINAN':
-                            df = data_loader.get_sinan_data(ano, force_refresh=True)
-                        elif sistema == 'SINASC':
-                            df = data_loader.get_sinasc_data(ano, force_refresh=True)
-                        
-                        registros = len(df) if df is not None else 0
+                        registros, tentativas = futuro.result()
+                        sistema_record['tentativas'] += tentativas
                         sistema_record['anos_processados'] += 1
                         sistema_record['total_registros'] += registros
                         
-                        logger.info(f"  ✓ {sistema} {ano}: {registros} registros")
+                        logger.debug("  ✓ %s %s: %d registros", sistema, ano, registros)
                         
                     except Exception as e:
                         error_msg = f"Erro ao atualizar {sistema} {ano}: {e}"
-                        logger.error(f"  ✗ {error_msg}")
+                        logger.error("  ✗ %s", error_msg)
                         sistema_record['anos_com_erro'] += 1
+                        sistema_record['tentativas'] += getattr(e, 'tentativas', 1)
                         update_record['errors'].append(error_msg)
-                        # Continua com o próximo ano (não aborta tudo)
-                
+                        # Continua com os demais anos (não aborta tudo)
+            
+            for sistema, sistema_record in sistema_records.items():
                 update_record['systems'][sistema] = sistema_record
-                logger.info(f"{sistema}: {sistema_record['anos_processados']} anos processados, "
-                           f"{sistema_record['anos_com_erro']} erros")
+                logger.debug("%s: %d anos processados, %d erros", sistema,
+                           sistema_record['anos_processados'], sistema_record['anos_com_erro'])
             
             # Limpar cache antigo
             self.clear_old_cache()
@@ -165,37 +322,36 @@ class DataUpdateScheduler:
                 update_record['status'] = 'success'
                 logger.info("Atualização concluída com SUCESSO")
             
-            self.update_history.append(update_record)
+            self._registrar_historico(update_record)
             
-            logger.info(f"Próxima atualização: {self.next_update}")
-            logger.info("=" * 60)
+            logger.info("Próxima atualização: %s", self.next_update)
+            logger.debug("=" * 60)
             
         except Exception as e:
             error_msg = f"Erro CRÍTICO na atualização: {e}"
             logger.error(error_msg)
             update_record['errors'].append(error_msg)
             update_record['status'] = 'failed'
-            self.update_history.append(update_record)
+            self._registrar_historico(update_record)
+    
+    def _registrar_historico(self, update_record: dict):
+        """Guarda o registro no histórico em memória e no log de auditoria (JSONL)"""
+        self.update_history.append(update_record)
+        try:
+            audit_logger.info(json.dumps(update_record, default=str, ensure_ascii=False,
+                                         separators=(',', ':')))
+        except Exception as e:
+            logger.error("Erro ao gravar histórico de atualizações: %s", e)
     
     def _calculate_next_update(self) -> datetime:
         """Calcula próxima atualização baseada na configuração"""
-        dias_semana = {
-            'domingo': 0, 'segunda': 1, 'terca': 2, 'quarta': 3,
-            'quinta': 4, 'sexta': 5, 'sabado': 6
-        }
-        
-        dia_alvo = dias_semana.get(ATUALIZACAO['dia_semana'], 6)
-        hora_alvo = int(ATUALIZACAO['hora'].split(':')[0])
-        minuto_alvo = int(ATUALIZACAO['hora'].split(':')[1])
-        
         agora = datetime.now()
-        dias_ate = (dia_alvo - agora.weekday()) % 7
-        
-        if dias_ate == 0 and agora.hour >= hora_alvo:
-            dias_ate = 7
+        proxima = agora.replace(hour=self._hora_alvo, minute=self._minuto_alvo, second=0, microsecond=0)
+        proxima += timedelta(days=(self._dia_alvo - agora.weekday()) % 7)
         
-        proxima = agora + timedelta(days=dias_ate)
-        proxima = proxima.replace(hour=hora_alvo, minute=minuto_alvo, second=0, microsecond=0)
+        # Mesmo dia, mas o horário já passou: próxima semana
+        if proxima <= agora:
+            proxima += timedelta(days=7)
         
         return proxima
     
@@ -207,41 +363,52 @@ class DataUpdateScheduler:
         em ATUALIZACAO['retencao_dias']
         """
         try:
+            from data_loader import DataCache
             cache = DataCache()
             cache_info = cache.get_cache_info()
             
-            logger.info(f"Limpando cache antigo (retenção: {ATUALIZACAO['retencao_dias']} dias)")
-            logger.info(f"Cache atual: {cache_info['total_data_files']} arquivos, "
-                       f"{cache_info['total_size_mb']} MB")
+            logger.info("Limpando cache antigo (retenção: %s dias)", ATUALIZACAO['retencao_dias'])
+            logger.info("Cache atual: %s arquivos, %s MB",
+                        cache_info['total_data_files'], cache_info['total_size_mb'])
             
             limite = datetime.now() - timedelta(days=ATUALIZACAO['retencao_dias'])
             
+            limite_ts = limite.timestamp()
+            
+            # Uma única leitura do diretório; chaves expiradas são coletadas
+            # primeiro e removidas depois. A idade vem do mtime do arquivo de
+            # metadados (gravado junto com o cache): o JSON só é lido para
+            # descobrir a chave dos que vão ser removidos
+            expiradas = []
+            with os.scandir(CACHE_DIR) as entradas:
+                for entrada in entradas:
+                    if not entrada.name.endswith("_meta.json"):
+                        continue
+                    try:
+                        if entrada.stat().st_mtime >= limite_ts:
+                            continue
+                        
+                        with open(entrada.path, 'rb') as f:
+                            metadata = json.loads(f.read())
+                        expiradas.append(metadata.get('key', entrada.name[:-len("_meta.json")]))
+                            
+                    except Exception as e:
+                        logger.error("Erro ao processar cache %s: %s", entrada.name, e)
+            
             removidos = 0
-            for meta_file in CACHE_DIR.glob("*_meta.json"):
+            for key in expiradas:
                 try:
-                    import json
-                    with open(meta_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                    
-                    cache_time = datetime.fromisoformat(metadata.get('timestamp', datetime.now().isoformat()))
-                    
-                    if cache_time < limite:
-                        # Remover arquivo de dados
-                        data_file = CACHE_DIR / metadata.get('data_file', '')
-                        if data_file.exists():
-                            data_file.unlink()
-                        # Remover metadados
-                        meta_file.unlink()
-                        removidos += 1
-                        logger.info(f"Cache removido: {meta_file.stem}")
-                        
+                    # Remover dados, metadados e entrada do índice
+                    cache.remove(key)
+                    removidos += 1
+                    logger.info("Cache removido: %s", key)
                 except Exception as e:
-                    logger.error(f"Erro ao processar cache {meta_file}: {e}")
+                    logger.error("Erro ao remover cache %s: %s", key, e)
             
-            logger.info(f"Limpeza concluída: {removidos} arquivos removidos")
+            logger.info("Limpeza concluída: %d arquivos removidos", removidos)
             
         except Exception as e:
-            logger.error(f"Erro ao limpar cache: {e}")
+            logger.error("Erro ao limpar cache: %s", e)
     
     def job(self):
         """Tarefa de atualização executada pelo agendador"""
@@ -253,13 +420,18 @@ class DataUpdateScheduler:
         Inicia o agendador
         
         CONFIGURAÇÃO:
-        - Executa a primeira atualização imediatamente
+        - Executa a primeira atualização imediatamente, na thread do timer
+          (start() retorna logo; quem chamou pode aguardar sinais de parada)
         - Agenda próximas execuções conforme configuração
-        - Inicia thread em background para verificação periódica
+        - Usa um threading.Timer até a próxima data (rearmado a cada execução)
         """
-        if self.running:
-            logger.warning("Agendador já está em execução")
-            return
+        with self._lock:
+            if self.running:
+                logger.warning("Agendador já está em execução")
+                return
+            self.running = True
+        
+        self._pysus_cache = None
         
         logger.info("=" * 60)
         logger.info("INICIANDO AGENDADOR DE ATUALIZAÇÃO")
@@ -269,49 +441,61 @@ class DataUpdateScheduler:
         dia = ATUALIZACAO['dia_semana']
         hora = ATUALIZACAO['hora']
         
-        logger.info(f"Configuração: {dia} às {hora}")
-        logger.info(f"Frequência: {ATUALIZACAO['frequencia']}")
-        
-        if dia == 'domingo':
-            schedule.every().sunday.at(hora).do(self.job)
-        elif dia == 'segunda':
-            schedule.every().monday.at(hora).do(self.job)
-        elif dia == 'terca':
-            schedule.every().tuesday.at(hora).do(self.job)
-        elif dia == 'quarta':
-            schedule.every().wednesday.at(hora).do(self.job)
-        elif dia == 'quinta':
-            schedule.every().thursday.at(hora).do(self.job)
-        elif dia == 'sexta':
-            schedule.every().friday.at(hora).do(self.job)
-        elif dia == 'sabado':
-            schedule.every().saturday.at(hora).do(self.job)
+        logger.info("Configuração: %s às %s", dia, hora)
+        logger.info("Frequência: %s", ATUALIZACAO['frequencia'])
         
-        self.running = True
-        self.next_update = self._calculate_next_update()
-        
-        # Executar primeira atualização
-        logger.info("Executando atualização inicial...")
-        self.job()
+        # Primeira atualização imediata; ao terminar, _fire agenda a próxima
+        # (um único timer até a data calculada)
+        logger.info("Executando atualização inicial em segundo plano...")
+        self._arm_timer(espera=0.0)
         
-        # Iniciar thread
-        self.thread = threading.Thread(target=self._run_scheduler, daemon=True)
-        self.thread.start()
-        
-        logger.info(f"Agendador iniciado. Próxima atualização: {self.next_update}")
+        logger.info("Agendador iniciado")
         logger.info("=" * 60)
     
-    def _run_scheduler(self):
-        """Loop do agendador - executa em thread separada"""
-        while self.running:
-            schedule.run_pending()
-            time.sleep(60)  # Verificar a cada minuto
+    def _arm_timer(self, espera: Optional[float] = None):
+        """
+        Agenda um timer para a próxima atualização (sem polling)
+        
+        Sem `espera`, aguarda até a próxima data configurada.
+        """
+        with self._lock:
+            # stop() pode ter sido chamado durante a execução da tarefa
+            if not self.running:
+                return
+            if espera is None:
+                self.next_update = self._calculate_next_update()
+                espera = max(0.0, (self.next_update - datetime.now()).total_seconds())
+            else:
+                self.next_update = datetime.now() + timedelta(seconds=espera)
+            self.thread = threading.Timer(espera, self._fire)
+            self.thread.daemon = True
+            self.thread.start()
+    
+    def _fire(self):
+        """Executa a tarefa agendada e reagenda a seguinte"""
+        with self._lock:
+            if not self.running:
+                return
+        self.job()
+        self._arm_timer()
     
-    def stop(self):
-        """Para o agendador de forma segura"""
-        self.running = False
-        if self.thread:
-            self.thread.join()
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Para o agendador de forma segura
+        
+        Com `timeout`, espera no máximo esse tempo por uma atualização em
+        andamento; a thread do timer é daemon e é interrompida na saída do
+        processo (gravações do cache são atômicas).
+        """
+        with self._lock:
+            self.running = False
+            timer = self.thread
+        if timer:
+            timer.cancel()
+            if timer is not threading.current_thread():
+                timer.join(timeout)
+                if timer.is_alive():
+                    logger.warning("Atualização em andamento interrompida na parada")
         logger.info("Agendador parado")
     
     def get_status(self) -> dict:
@@ -324,18 +508,31 @@ class DataUpdateScheduler:
             'day': ATUALIZACAO['dia_semana'],
             'time': ATUALIZACAO['hora'],
             'update_history_count': len(self.update_history),
-            'pysus_available': data_loader.is_pysus_available()
+            'pysus_available': self._pysus_disponivel()
         }
     
-    def get_update_history(self) -> list:
-        """Retorna histórico de atualizações"""
-        return self.update_history
+    def _pysus_disponivel(self) -> bool:
+        """Verifica o PySUS (mesmo teste do data_loader), reaproveitando por PYSUS_CACHE_TTL"""
+        agora = time.monotonic()
+        if self._pysus_cache is None or agora - self._pysus_cache[0] > PYSUS_CACHE_TTL:
+            self._pysus_cache = (agora, importlib.util.find_spec('pysus') is not None)
+        return self._pysus_cache[1]
+    
+    def get_update_history(self) -> tuple:
+        """Retorna cópia imutável do histórico (as mais recentes, em memória)"""
+        return tuple(self.update_history)
 
 
 # Instância global
 scheduler = DataUpdateScheduler()
 
 
+@lru_cache(maxsize=1)
+def _in_venv() -> bool:
+    """Verifica se está executando dentro de um ambiente virtual"""
+    return sys.prefix != sys.base_prefix or hasattr(sys, 'real_prefix')
+
+
 def run_manual_update():
     """Executa atualização manual única"""
     print("=" * 60)
@@ -344,7 +541,7 @@ def run_manual_update():
     print()
     
     # Verificar ambiente virtual
-    if not hasattr(sys, 'real_prefix') and not (hasattr(sys, 'base_prefix') and sys.base_prefix != sys.prefix):
+    if not _in_venv():
         print("⚠️  AVISO: Ambiente virtual não detectado!")
         print("Recomenda-se ativar o ambiente virtual antes de executar.")
         print()
@@ -372,7 +569,7 @@ def run_scheduler_daemon():
     print()
     
     # Verificar ambiente virtual
-    if not hasattr(sys, 'real_prefix') and not (hasattr(sys, 'base_prefix') and sys.base_prefix != sys.prefix):
+    if not _in_venv():
         print("⚠️  AVISO: Ambiente virtual não detectado!")
         print("O agendador deve ser executado dentro do ambiente virtual.")
         print()
@@ -395,16 +592,17 @@ def run_scheduler_daemon():
     print("=" * 60)
     print()
     
-    scheduler.start()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sinal, lambda *_: _stop_event.set())
     
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        print()
-        print("\nParando agendador...")
-        scheduler.stop()
-        print("Agendador parado.")
+    # A atualização inicial roda na thread do timer: o processo principal já
+    # fica ocioso aguardando o sinal de parada, inclusive durante ela
+    scheduler.start()
+    _stop_event.wait()
+    print()
+    print("\nParando agendador...")
+    scheduler.stop(timeout=ESPERA_PARADA)
+    print("Agendador parado.")
 
 
 def show_status():
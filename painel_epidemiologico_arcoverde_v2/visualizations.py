@@ -7,15 +7,93 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import folium
-from folium.plugins import HeatMap, MarkerCluster
+from folium.plugins import FastMarkerCluster, HeatMap, MarkerCluster
 import json
+from types import MappingProxyType
+from functools import lru_cache
 
 from config import (
     TEMA_CORES, PALETA_GRAFICOS, MUNICIPIO, 
     FAIXAS_ETARIAS, RACA_COR, ESCOLARIDADE, ESTADO_CIVIL
 )
+from faixas import calcular_faixas_etarias
+
+# Layout padrão dos gráficos (tema similar ao CNIE), montado uma única vez
+_LAYOUT_TEMA = MappingProxyType(dict(
+    font=dict(family="Arial, sans-serif", size=12, color=TEMA_CORES["preto"]),
+    paper_bgcolor=TEMA_CORES["branco"],
+    plot_bgcolor=TEMA_CORES["cinza_claro"],
+    margin=dict(l=40, r=40, t=60, b=40),
+    title_font=dict(size=16, color=TEMA_CORES["primaria"], family="Arial, sans-serif"),
+    legend=dict(
+        bgcolor="rgba(255,255,255,0.8)",
+        bordercolor=TEMA_CORES["cinza"],
+        borderwidth=1
+    )
+))
+
+# Rótulos das colunas do heatmap mensal (meses 1..12)
+_MESES = ('Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun',
+          'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez')
+
+# Heatmap do mapa: acima de LIMITE_PONTOS_HEATMAP pontos, agrega numa grade
+# de GRADE_HEATMAP células por eixo
+LIMITE_PONTOS_HEATMAP = 5000
+GRADE_HEATMAP = 200
+
+# Pontos máximos enviados por série em gráficos de linha (~largura da tela)
+MAX_PONTOS_LINHA = 2000
+
+
+def _lttb(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Índices dos pontos mantidos pelo Largest-Triangle-Three-Buckets
+    
+    Preserva o primeiro e o último ponto e, em cada balde intermediário, o
+    ponto que forma o maior triângulo com o escolhido anterior e a média do
+    balde seguinte. O eixo x é a posição, então serve para qualquer rótulo.
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    
+    y = np.asarray(y, dtype=float)
+    x = np.arange(n, dtype=float)
+    bordas = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        ini, fim = bordas[i], bordas[i + 1]
+        prox_fim = bordas[i + 2] if i + 2 < len(bordas) else n
+        mx, my = x[fim:prox_fim].mean(), y[fim:prox_fim].mean()
+        area = np.abs((x[a] - mx) * (y[ini:fim] - y[a]) - (x[a] - x[ini:fim]) * (my - y[a]))
+        a = ini + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+@lru_cache(maxsize=32)
+def _figura_vazia(titulo: str) -> go.Figure:
+    """
+    Figura mínima com o aviso "Sem dados", reaproveitada por título
+    
+    A mesma instância é devolvida a cada chamada: não deve ser modificada.
+    """
+    fig = go.Figure()
+    fig.update_layout(
+        title=titulo,
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False),
+        annotations=[dict(text="Sem dados", showarrow=False,
+                          x=0.5, y=0.5, xref='paper', yref='paper',
+                          font=dict(size=14, color=TEMA_CORES["cinza"]))],
+        **_LAYOUT_TEMA
+    )
+    return fig
 
 
 class DashboardCharts:
@@ -27,20 +105,42 @@ class DashboardCharts:
         
     def _apply_theme(self, fig: go.Figure) -> go.Figure:
         """Aplica tema padrão aos gráficos"""
-        fig.update_layout(
-            font=dict(family="Arial, sans-serif", size=12, color=self.theme["preto"]),
-            paper_bgcolor=self.theme["branco"],
-            plot_bgcolor=self.theme["cinza_claro"],
-            margin=dict(l=40, r=40, t=60, b=40),
-            title_font=dict(size=16, color=self.theme["primaria"], family="Arial, sans-serif"),
-            legend=dict(
-                bgcolor="rgba(255,255,255,0.8)",
-                bordercolor=self.theme["cinza"],
-                borderwidth=1
-            )
-        )
+        fig.update_layout(**_LAYOUT_TEMA)
         return fig
     
+    @staticmethod
+    def _map_labels(index, mapping: Dict[str, str]) -> List[str]:
+        """Traduz códigos para rótulos; códigos sem rótulo ficam como texto"""
+        codigos = pd.Series(np.asarray(index, dtype=str))
+        return codigos.map(mapping).fillna(codigos).tolist()
+    
+    @staticmethod
+    def _to_typed(valores, dtype=None) -> np.ndarray:
+        """
+        Converte dados de um trace em ndarray contíguo
+        
+        Contagens inteiras viram int32 e os demais valores float64 (float32
+        apareceria com ruído nos rótulos de hover do Plotly).
+        """
+        arr = np.asarray(valores)
+        if arr.dtype == object:
+            arr = pd.to_numeric(pd.Series(arr), errors='coerce').to_numpy(dtype=float)
+        if dtype is None:
+            dtype = np.int32 if np.issubdtype(arr.dtype, np.integer) else np.float64
+        return np.ascontiguousarray(arr, dtype=dtype)
+    
+    @staticmethod
+    def _histograma(serie: pd.Series, bins: int, cor: str) -> go.Bar:
+        """Histograma pré-agregado: envia só as contagens por faixa ao navegador"""
+        valores = pd.to_numeric(serie, errors='coerce').dropna().to_numpy()
+        contagens, bordas = np.histogram(valores, bins=bins)
+        return go.Bar(
+            x=(bordas[:-1] + bordas[1:]) / 2,
+            y=contagens.astype(np.int32),
+            width=np.diff(bordas),
+            marker_color=cor
+        )
+    
     def indicadores_cards(self, dados: Dict[str, int]) -> go.Figure:
         """Cria cards de indicadores principais"""
         fig = go.Figure()
@@ -72,14 +172,21 @@ class DashboardCharts:
                           y_col: str = 'quantidade', titulo: str = "",
                           cor: str = None) -> go.Figure:
         """Gráfico de linha para evolução temporal"""
+        if df is None or df.empty:
+            return _figura_vazia(titulo)
         if cor is None:
             cor = self.theme["primaria"]
         
         fig = go.Figure()
         
+        x, y = df[x_col].to_numpy(), self._to_typed(df[y_col])
+        if len(y) > MAX_PONTOS_LINHA:
+            manter = _lttb(y, MAX_PONTOS_LINHA)
+            x, y = x[manter], y[manter]
+        
         fig.add_trace(go.Scatter(
-            x=df[x_col],
-            y=df[y_col],
+            x=x,
+            y=y,
             mode='lines+markers',
             name='Quantidade',
             line=dict(color=cor, width=3),
@@ -102,23 +209,21 @@ class DashboardCharts:
                                    coluna_idade: str = 'idade',
                                    titulo: str = "Distribuição por Faixa Etária") -> go.Figure:
         """Gráfico de barras para distribuição por faixa etária"""
-        # Calcular faixas etárias
-        df['faixa_etaria'] = df[coluna_idade].apply(
-            lambda x: next(
-                (faixa for faixa, (min_i, max_i) in FAIXAS_ETARIAS.items() 
-                 if min_i <= x <= max_i), "Não informado"
-            )
-        )
+        if df is None or df.empty:
+            return _figura_vazia(titulo)
+        # Calcular faixas etárias (vetorizado, sem alterar df)
+        faixa = calcular_faixas_etarias(df[coluna_idade])
         
-        contagem = df['faixa_etaria'].value_counts().reindex(FAIXAS_ETARIAS.keys()).fillna(0)
+        contagem = faixa.value_counts(sort=False).reindex(FAIXAS_ETARIAS.keys(), fill_value=0)
         
         fig = go.Figure(data=[
             go.Bar(
                 x=contagem.index,
-                y=contagem.values,
+                y=self._to_typed(contagem),
                 marker_color=self.colors[:len(contagem)],
-                text=contagem.values,
-                textposition='outside'
+                texttemplate='%{y}',
+                textposition='outside',
+                cliponaxis=False
             )
         ])
         
@@ -136,15 +241,18 @@ class DashboardCharts:
                                coluna_raca: str = 'raca_cor',
                                titulo: str = "Distribuição por Raça/Cor") -> go.Figure:
         """Gráfico de pizza para distribuição por raça/cor"""
-        contagem = df[coluna_raca].value_counts()
+        if df is None or df.empty:
+            return _figura_vazia(titulo)
+        # Ordem é irrelevante: o gráfico de pizza ordena pelas fatias
+        contagem = df[coluna_raca].value_counts(sort=False)
         
         # Mapear códigos para nomes
-        labels = [RACA_COR.get(str(k), str(k)) for k in contagem.index]
+        labels = self._map_labels(contagem.index, RACA_COR)
         
         fig = go.Figure(data=[
             go.Pie(
                 labels=labels,
-                values=contagem.values,
+                values=self._to_typed(contagem),
                 hole=0.4,
                 marker_colors=self.colors[:len(contagem)],
                 textinfo='label+percent',
@@ -164,18 +272,20 @@ class DashboardCharts:
                           coluna_sexo: str = 'sexo',
                           titulo: str = "Distribuição por Sexo") -> go.Figure:
         """Gráfico de pizza para distribuição por sexo"""
-        contagem = df[coluna_sexo].value_counts()
+        if df is None or df.empty:
+            return _figura_vazia(titulo)
+        contagem = df[coluna_sexo].value_counts(sort=False)
         
         # Mapear códigos
         sexo_map = {'M': 'Masculino', 'F': 'Feminino', 'I': 'Ignorado'}
-        labels = [sexo_map.get(str(k), str(k)) for k in contagem.index]
+        labels = self._map_labels(contagem.index, sexo_map)
         
         colors_sexo = [self.theme["primaria"], "#E91E63", self.theme["cinza"]]
         
         fig = go.Figure(data=[
             go.Pie(
                 labels=labels,
-                values=contagem.values,
+                values=self._to_typed(contagem),
                 marker_colors=colors_sexo[:len(contagem)],
                 textinfo='label+percent',
                 textposition='outside'
@@ -192,16 +302,28 @@ class DashboardCharts:
     def top_causas(self, df: pd.DataFrame, coluna_causa: str = 'causa_basica',
                    n_top: int = 10, titulo: str = "Principais Causas") -> go.Figure:
         """Gráfico de barras horizontais para top causas"""
-        contagem = df[coluna_causa].value_counts().head(n_top).sort_values()
+        if df is None or df.empty:
+            return _figura_vazia(titulo)
+        # Contagem por código da categoria (bincount) e seleção parcial dos n maiores
+        serie = df[coluna_causa]
+        cat = serie.array if isinstance(serie.dtype, pd.CategoricalDtype) else pd.Categorical(serie)
+        codigos = cat.codes
+        contagens = np.bincount(codigos[codigos >= 0], minlength=len(cat.categories))
+        n = min(n_top, len(contagens))
+        top = np.argpartition(-contagens, n - 1)[:n] if 0 < n < len(contagens) else np.arange(n)
+        top = top[contagens[top] > 0]
+        top = top[np.argsort(contagens[top], kind='stable')]
+        contagem = pd.Series(contagens[top], index=cat.categories.take(top))
         
         fig = go.Figure(data=[
             go.Bar(
                 y=[f"CID: {c}" for c in contagem.index],
-                x=contagem.values,
+                x=self._to_typed(contagem),
                 orientation='h',
                 marker_color=self.theme["primaria"],
-                text=contagem.values,
-                textposition='outside'
+                texttemplate='%{x}',
+                textposition='outside',
+                cliponaxis=False
             )
         ])
         
@@ -217,25 +339,34 @@ class DashboardCharts:
     
     def heatmap_mensal(self, df: pd.DataFrame, ano_col: str = 'ano',
                        mes_col: str = 'mes', valor_col: str = None,
-                       titulo: str = "Heatmap Mensal") -> go.Figure:
-        """Heatmap de dados por ano e mês"""
-        if valor_col:
-            pivot = df.pivot_table(values=valor_col, index=ano_col, 
-                                   columns=mes_col, aggfunc='sum', fill_value=0)
+                       titulo: str = "Heatmap Mensal",
+                       agregado: bool = False) -> go.Figure:
+        """
+        Heatmap de dados por ano e mês
+        
+        Com agregado=True, df já é a matriz ano × mês (índice = anos,
+        colunas = meses) e é usado diretamente.
+        """
+        if df is None or df.empty:
+            return _figura_vazia(titulo)
+        if agregado:
+            pivot = df
+        elif valor_col:
+            pivot = (df.groupby([ano_col, mes_col], observed=True)[valor_col]
+                     .sum().unstack(fill_value=0))
         else:
-            pivot = df.pivot_table(index=ano_col, columns=mes_col, 
-                                   aggfunc='size', fill_value=0)
+            pivot = (df.groupby([ano_col, mes_col], observed=True)
+                     .size().unstack(fill_value=0))
         
-        meses = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun',
-                 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+        # Sempre os 12 meses, na ordem (meses sem registro ficam com 0)
+        pivot = pivot.reindex(columns=range(1, 13), fill_value=0)
         
         fig = go.Figure(data=go.Heatmap(
-            z=pivot.values,
-            x=[meses[i-1] if 1 <= i <= 12 else str(i) for i in pivot.columns],
-            y=pivot.index,
+            z=self._to_typed(pivot),
+            x=_MESES,
+            y=pivot.index.to_numpy(),
             colorscale='Blues',
-            text=pivot.values,
-            texttemplate="%{text}",
+            texttemplate="%{z}",
             textfont={"size": 10},
             hoverongaps=False
         ))
@@ -249,9 +380,17 @@ class DashboardCharts:
         
         return self._apply_theme(fig)
     
-    def comparativo_sistemas(self, dados: Dict[str, pd.DataFrame],
+    def comparativo_sistemas(self, dados: Dict[str, Union[pd.DataFrame, pd.Series]],
                              titulo: str = "Comparativo entre Sistemas") -> go.Figure:
-        """Gráfico comparativo entre SIM, SINAN e SINASC"""
+        """
+        Gráfico comparativo entre SIM, SINAN e SINASC
+        
+        Cada valor de `dados` pode ser o DataFrame do sistema ou a contagem
+        ano -> registros já calculada (Series), que é usada diretamente.
+        """
+        if not any(len(d) for d in dados.values()):
+            return _figura_vazia(titulo)
+        
         fig = go.Figure()
         
         cores = {
@@ -261,11 +400,18 @@ class DashboardCharts:
         }
         
         for sistema, df in dados.items():
-            if 'ano' in df.columns and len(df) > 0:
-                agg = df.groupby('ano').size().reset_index(name='quantidade')
+            if isinstance(df, pd.DataFrame):
+                if 'ano' not in df.columns:
+                    continue
+                df = df['ano'].value_counts(sort=False).sort_index()
+            if len(df) > 0:
+                x, y = self._to_typed(df.index), self._to_typed(df)
+                if len(y) > MAX_PONTOS_LINHA:
+                    manter = _lttb(y, MAX_PONTOS_LINHA)
+                    x, y = x[manter], y[manter]
                 fig.add_trace(go.Scatter(
-                    x=agg['ano'],
-                    y=agg['quantidade'],
+                    x=x,
+                    y=y,
                     mode='lines+markers',
                     name=sistema,
                     line=dict(color=cores.get(sistema, self.theme["primaria"]), width=2)
@@ -285,17 +431,20 @@ class DashboardCharts:
                                    coluna_esc: str = 'escolaridade',
                                    titulo: str = "Distribuição por Escolaridade") -> go.Figure:
         """Gráfico de barras para escolaridade"""
-        contagem = df[coluna_esc].value_counts().sort_index()
+        if df is None or df.empty:
+            return _figura_vazia(titulo)
+        contagem = df[coluna_esc].value_counts(sort=False).sort_index()
         
-        labels = [ESCOLARIDADE.get(str(k), str(k)) for k in contagem.index]
+        labels = self._map_labels(contagem.index, ESCOLARIDADE)
         
         fig = go.Figure(data=[
             go.Bar(
                 x=labels,
-                y=contagem.values,
+                y=self._to_typed(contagem),
                 marker_color=self.theme["terciaria"],
-                text=contagem.values,
-                textposition='outside'
+                texttemplate='%{y}',
+                textposition='outside',
+                cliponaxis=False
             )
         ])
         
@@ -311,16 +460,15 @@ class DashboardCharts:
     
     def indicadores_sinasc(self, df: pd.DataFrame) -> Dict[str, go.Figure]:
         """Cria gráficos específicos para SINASC"""
+        if df is None or df.empty:
+            return {}
+        
         figs = {}
         
         # Peso ao nascer
         if 'peso' in df.columns:
             fig_peso = go.Figure(data=[
-                go.Histogram(
-                    x=df['peso'],
-                    nbinsx=30,
-                    marker_color=self.theme["sucesso"]
-                )
+                self._histograma(df['peso'], 30, self.theme["sucesso"])
             ])
             fig_peso.update_layout(
                 title="Distribuição do Peso ao Nascer",
@@ -332,11 +480,7 @@ class DashboardCharts:
         # Idade da mãe
         if 'idade_mae' in df.columns:
             fig_idade_mae = go.Figure(data=[
-                go.Histogram(
-                    x=df['idade_mae'],
-                    nbinsx=20,
-                    marker_color=self.theme["primaria"]
-                )
+                self._histograma(df['idade_mae'], 20, self.theme["primaria"])
             ])
             fig_idade_mae.update_layout(
                 title="Distribuição da Idade da Mãe",
@@ -348,13 +492,13 @@ class DashboardCharts:
         # Tipo de parto
         if 'tipo_parto' in df.columns:
             parto_map = {'1': 'Vaginal', '2': 'Cesárea', '9': 'Ignorado'}
-            contagem = df['tipo_parto'].value_counts()
-            labels = [parto_map.get(str(k), str(k)) for k in contagem.index]
+            contagem = df['tipo_parto'].value_counts(sort=False)
+            labels = self._map_labels(contagem.index, parto_map)
             
             fig_parto = go.Figure(data=[
                 go.Pie(
                     labels=labels,
-                    values=contagem.values,
+                    values=self._to_typed(contagem),
                     marker_colors=[self.theme["sucesso"], self.theme["info"], self.theme["cinza"]]
                 )
             ])
@@ -388,13 +532,44 @@ class MapVisualization:
         return m
     
     def add_heatmap(self, m: folium.Map, pontos: List[Tuple[float, float, float]]) -> folium.Map:
-        """Adiciona heatmap ao mapa"""
-        HeatMap(pontos, radius=15, blur=25).add_to(m)
+        """
+        Adiciona heatmap ao mapa
+        
+        Acima de LIMITE_PONTOS_HEATMAP pontos, agrega em uma grade
+        GRADE_HEATMAP² (np.histogram2d ponderado) e envia só as células não
+        vazias, nunca mais que os pontos de entrada.
+        """
+        pontos = np.asarray(pontos, dtype=float)
+        if len(pontos) > LIMITE_PONTOS_HEATMAP:
+            pesos = pontos[:, 2] if pontos.shape[1] > 2 else None
+            grade, bordas_lat, bordas_lon = np.histogram2d(
+                pontos[:, 0], pontos[:, 1], bins=GRADE_HEATMAP, weights=pesos
+            )
+            i, j = np.nonzero(grade)
+            centros_lat = (bordas_lat[:-1] + bordas_lat[1:]) / 2
+            centros_lon = (bordas_lon[:-1] + bordas_lon[1:]) / 2
+            pontos = np.column_stack([centros_lat[i], centros_lon[j], grade[i, j]])
+        HeatMap(pontos.tolist(), radius=15, blur=25).add_to(m)
         return m
     
     def add_marker_cluster(self, m: folium.Map, 
-                          pontos: List[Dict]) -> folium.Map:
-        """Adiciona cluster de marcadores"""
+                          pontos: Union[np.ndarray, List[Dict]]) -> folium.Map:
+        """
+        Adiciona cluster de marcadores
+        
+        `pontos` pode ser um array (N, 2) de lat/lon ou a lista de dicts com
+        'lat', 'lon' e opcionalmente 'popup'/'color'. Sem popup nem cor por
+        ponto, usa FastMarkerCluster (agrupamento feito no navegador, sem um
+        objeto Marker por ponto).
+        """
+        if isinstance(pontos, np.ndarray):
+            FastMarkerCluster(data=pontos[:, :2].tolist()).add_to(m)
+            return m
+        
+        if not any('popup' in p or 'color' in p for p in pontos):
+            FastMarkerCluster(data=[[p['lat'], p['lon']] for p in pontos]).add_to(m)
+            return m
+        
         marker_cluster = MarkerCluster().add_to(m)
         
         for ponto in pontos: